@@ -3,6 +3,7 @@ Manually add popular movies to movies.csv
 Useful when API quota is exceeded or for testing
 """
 import pandas as pd
+from live_update import push_movies_to_server
 
 # Popular movies with descriptions
 POPULAR_MOVIES = [
@@ -155,8 +156,9 @@ def add_manual_movies():
         for movie in new_movies:
             print(f"      ✅ {movie['title']}")
         
-        print(f"\n   🚀 Restart your server to load the updated dataset!")
-        print(f"   Run: uvicorn main:app --reload")
+        if not push_movies_to_server(new_movies):
+            print(f"\n   🚀 Restart your server to load the updated dataset!")
+            print(f"   Run: uvicorn main:app --reload")
     else:
         print(f"\n⚠️  No new movies were added")
         print(f"   All movies may already be in the database")
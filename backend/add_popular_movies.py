@@ -4,6 +4,7 @@ Add popular movies to existing movies.csv using IMDb API
 import pandas as pd
 import requests
 import time
+from live_update import push_movies_to_server
 
 # Your IMDb API key
 API_KEY = "663266ffe2mshb8ea82ebefb8444p1ef691jsn20e470584a5f"
@@ -140,8 +141,9 @@ def add_popular_movies():
         print(f"\n✅ SUCCESS!")
         print(f"   Added {len(new_movies)} new movies")
         print(f"   Total movies: {len(combined_df)}")
-        print(f"\n   🚀 Restart your server to load the updated dataset!")
-        print(f"   Run: uvicorn main:app --reload")
+        if not push_movies_to_server(new_movies):
+            print(f"\n   🚀 Restart your server to load the updated dataset!")
+            print(f"   Run: uvicorn main:app --reload")
     else:
         print(f"\n⚠️  No new movies were added")
         print(f"   All requested movies may already be in the database")
@@ -5,6 +5,7 @@ This uses the IMDb Top 250 endpoint which includes popular movies like The Matri
 import pandas as pd
 import requests
 import time
+from live_update import push_movies_to_server
 
 # Your IMDb API key
 API_KEY = "4693d1a451mshbcee3887e70e47bp12b701jsn82f577692fd1"
@@ -138,8 +139,9 @@ def add_top250_movies(limit=250):
         for i, row in new_df.head(10).iterrows():
             print(f"      - {row['title']}")
         
-        print(f"\n   🚀 Restart your server to load the updated dataset!")
-        print(f"   Run: uvicorn main:app --reload")
+        if not push_movies_to_server(new_movies):
+            print(f"\n   🚀 Restart your server to load the updated dataset!")
+            print(f"   Run: uvicorn main:app --reload")
     else:
         print(f"\n⚠️  No new movies were added")
         print(f"   All movies from Top 250 may already be in the database")
@@ -0,0 +1,142 @@
+"""
+Approximate nearest-neighbour index for large movie catalogs
+"""
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import normalize
+from sklearn.utils.extmath import safe_sparse_dot
+from topk import top_k
+
+
+# Rows used to train the coarse quantizer, per inverted list
+TRAINING_ROWS_PER_LIST = 256
+
+# Rows assigned to their inverted lists per block during the build
+ASSIGN_CHUNK_ROWS = 8192
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) index for approximate cosine-similarity search.
+
+    Movies are clustered around n_lists centroids and stored in one inverted
+    list per centroid. A query is scored exactly against the movies of its
+    n_probe closest lists only, so n_probe trades recall for latency:
+    n_probe == n_lists is an exact search.
+    """
+
+    def __init__(self, n_lists=None, n_probe=8, random_state=42):
+        """
+        Initialize the index.
+
+        Args:
+            n_lists: Number of clusters (default: sqrt of the catalog size)
+            n_probe: Number of closest lists scanned per query
+            random_state: Seed for the clustering
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.random_state = random_state
+        self.centroids = None
+        self.list_offsets = None
+        self.list_items = None
+
+    def build(self, vectors):
+        """
+        Cluster the vectors and fill the inverted lists.
+
+        Args:
+            vectors: L2-normalized item vectors (sparse or dense), one row per movie
+
+        Returns:
+            The index itself
+        """
+        n_items = vectors.shape[0]
+        n_lists = min(self.n_lists or max(1, int(np.sqrt(n_items))), n_items)
+
+        # Train the coarse quantizer on a sample of the catalog
+        rng = np.random.default_rng(self.random_state)
+        n_train = min(n_items, n_lists * TRAINING_ROWS_PER_LIST)
+        train_rows = np.sort(rng.choice(n_items, size=n_train, replace=False))
+        kmeans = MiniBatchKMeans(
+            n_clusters=n_lists,
+            random_state=self.random_state,
+            n_init=3
+        )
+        kmeans.fit(vectors[train_rows])
+
+        # Spherical centroids, so list assignment and probing use cosine similarity
+        self.centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+
+        assignments = np.empty(n_items, dtype=np.int32)
+        for start in range(0, n_items, ASSIGN_CHUNK_ROWS):
+            stop = min(start + ASSIGN_CHUNK_ROWS, n_items)
+            centroid_scores = safe_sparse_dot(vectors[start:stop], self.centroids.T, dense_output=True)
+            assignments[start:stop] = np.argmax(centroid_scores, axis=1)
+
+        # Store the lists back to back: list i holds list_items[offsets[i]:offsets[i+1]]
+        self.list_items = np.argsort(assignments, kind='stable').astype(np.int32)
+        self.list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=self.list_offsets[1:])
+
+        print(f"IVF index built with {n_lists} lists.")
+        return self
+
+    def candidates(self, query, n_probe=None):
+        """
+        Collect the movies stored in the lists closest to the query.
+
+        Args:
+            query: Query vector of shape (1, n_features)
+            n_probe: Number of lists to scan (default: self.n_probe)
+
+        Returns:
+            Array of candidate movie indices
+        """
+        n_probe = n_probe or self.n_probe
+        centroid_scores = safe_sparse_dot(query, self.centroids.T, dense_output=True).ravel()
+        probed, _ = top_k(centroid_scores, n_probe)
+
+        return np.concatenate([
+            self.list_items[self.list_offsets[i]:self.list_offsets[i + 1]]
+            for i in probed
+        ])
+
+    def search(self, vectors, query, k, exclude=None, n_probe=None):
+        """
+        Find the approximate k nearest neighbours of a query.
+
+        Args:
+            vectors: The item vectors the index was built on
+            query: Query vector of shape (1, n_features)
+            k: Number of neighbours to return
+            exclude: Optional boolean mask over all movies to skip
+            n_probe: Number of lists to scan (default: self.n_probe)
+
+        Returns:
+            Tuple of (indices, scores) ordered by descending similarity
+        """
+        candidates = self.candidates(query, n_probe)
+        scores = safe_sparse_dot(vectors[candidates], query.T, dense_output=True).ravel()
+
+        candidate_mask = exclude[candidates] if exclude is not None else None
+        top, top_scores = top_k(scores, k, exclude=candidate_mask)
+        return candidates[top], top_scores
+
+    def add(self, vectors, first_id):
+        """
+        Insert new movies into their closest lists without re-clustering.
+
+        Args:
+            vectors: L2-normalized vectors of the new movies
+            first_id: Movie index of the first new row
+        """
+        centroid_scores = safe_sparse_dot(vectors, self.centroids.T, dense_output=True)
+        assignments = np.argmax(centroid_scores, axis=1)
+        order = np.argsort(assignments, kind='stable')
+        new_ids = (first_id + order).astype(np.int32)
+
+        # Each new movie goes to the end of its list
+        self.list_items = np.insert(self.list_items, self.list_offsets[assignments[order] + 1], new_ids)
+        counts = np.bincount(assignments, minlength=len(self.centroids))
+        self.list_offsets = self.list_offsets + np.concatenate([[0], np.cumsum(counts)])
@@ -0,0 +1,110 @@
+"""
+Coalescing of concurrent requests into batched model calls
+"""
+import asyncio
+
+
+class RequestCoalescer:
+    """
+    Groups calls that arrive within a short window into one batch call.
+
+    The first call for a key opens a batch and starts a timer; calls for the
+    same key that arrive before it fires join the batch. The batch is run
+    when the window ends or once it holds max_batch items, and each caller
+    gets its own result back. Keys keep apart items that cannot share a
+    batch, such as requests holding different model snapshots.
+
+    Runs on the event loop; the batch function itself is expected to hand
+    the work to a thread.
+    """
+
+    def __init__(self, run_batch, window_ms=2.0, max_batch=32):
+        """
+        Initialize the coalescer.
+
+        Args:
+            run_batch: Coroutine function (key, items) returning one result
+                per item, in order
+            window_ms: How long a batch stays open, in milliseconds
+            max_batch: Largest number of items per batch
+        """
+        self.run_batch = run_batch
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.pending = {}
+        self.timers = {}
+        # Running batch tasks, referenced until done so they are not collected
+        self.tasks = set()
+
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    async def submit(self, key, item):
+        """
+        Add an item to the open batch for key and await its result.
+
+        Args:
+            key: Hashable batch key
+            item: Request payload passed to run_batch
+
+        Returns:
+            The result run_batch produced for this item
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self.pending.setdefault(key, [])
+        batch.append((item, future))
+
+        if len(batch) >= self.max_batch:
+            self.flush(key)
+        elif len(batch) == 1:
+            self.timers[key] = loop.call_later(self.window, self.flush, key)
+
+        return await future
+
+    def flush(self, key):
+        """Close the open batch for key and start running it."""
+        timer = self.timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self.pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(key, batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _run(self, key, batch):
+        """Run one batch and resolve the futures of its callers."""
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        try:
+            results = await self.run_batch(key, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        """
+        Report batching activity.
+
+        Returns:
+            Dictionary with the limits, batch and item counts and the
+            average and largest batch size
+        """
+        return {
+            'window_ms': self.window * 1000,
+            'max_batch': self.max_batch,
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': self.items / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch
+        }
@@ -0,0 +1,286 @@
+"""
+Bounded in-process caches: W-TinyLFU for results, LRU for query vectors
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+# Share of the capacity given to the admission window (recency) and, within
+# the main region, to the protected segment (entries hit more than once)
+WINDOW_RATIO = 0.01
+PROTECTED_RATIO = 0.8
+
+# Frequency counters saturate at this value and are halved after
+# SAMPLE_FACTOR * capacity recorded accesses, so old popularity fades
+MAX_FREQUENCY = 15
+SAMPLE_FACTOR = 10
+SKETCH_DEPTH = 4
+
+
+class CountMinSketch:
+    """
+    Approximate access counts for an unbounded key space in fixed memory.
+
+    Each key increments one 4-bit-range counter per row; its estimate is
+    the minimum over the rows, which can only overcount.
+    """
+
+    def __init__(self, capacity):
+        """
+        Initialize the sketch.
+
+        Args:
+            capacity: Number of cache entries the sketch serves
+        """
+        width = 1
+        while width < 4 * max(capacity, 1):
+            width *= 2
+        self.mask = width - 1
+        self.table = np.zeros((SKETCH_DEPTH, width), dtype=np.uint8)
+        self.rows = np.arange(SKETCH_DEPTH)
+        self.sample_size = SAMPLE_FACTOR * max(capacity, 1)
+        self.additions = 0
+
+    def _slots(self, key):
+        return [hash((seed, key)) & self.mask for seed in range(SKETCH_DEPTH)]
+
+    def increment(self, key):
+        """Record one access to key."""
+        slots = self._slots(key)
+        counters = self.table[self.rows, slots]
+        self.table[self.rows, slots] = np.minimum(counters + 1, MAX_FREQUENCY)
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.table >>= 1
+            self.additions //= 2
+
+    def estimate(self, key):
+        """Estimated number of recent accesses to key."""
+        return int(self.table[self.rows, self._slots(key)].min())
+
+    def clear(self):
+        self.table[:] = 0
+        self.additions = 0
+
+
+class TinyLFUCache:
+    """
+    Fixed-size cache using the W-TinyLFU policy.
+
+    New entries go to a small LRU window. An entry leaving the window is
+    admitted to the main segmented-LRU region only if it has been requested
+    more often than the entry it would evict, so a burst of one-off keys
+    (typos, rare titles) cannot flush the popular entries. Main entries hit
+    a second time move from the probation to the protected segment.
+
+    All operations are thread-safe.
+    """
+
+    def __init__(self, capacity):
+        """
+        Initialize the cache.
+
+        Args:
+            capacity: Maximum number of entries
+        """
+        self.capacity = capacity
+        self.window_capacity = max(1, int(capacity * WINDOW_RATIO))
+        self.main_capacity = max(0, capacity - self.window_capacity)
+        self.protected_capacity = int(self.main_capacity * PROTECTED_RATIO)
+
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        self.sketch = CountMinSketch(capacity)
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def __len__(self):
+        return len(self.window) + len(self.probation) + len(self.protected)
+
+    def get(self, key):
+        """
+        Look up a key and record the access.
+
+        Args:
+            key: Hashable key
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self.lock:
+            self.sketch.increment(key)
+
+            if key in self.window:
+                self.window.move_to_end(key)
+                value = self.window[key]
+            elif key in self.protected:
+                self.protected.move_to_end(key)
+                value = self.protected[key]
+            elif key in self.probation:
+                # Second hit in the main region: promote, demoting the
+                # protected segment's least recent entry if it is full
+                value = self.protected[key] = self.probation.pop(key)
+                if len(self.protected) > self.protected_capacity:
+                    demoted, demoted_value = self.protected.popitem(last=False)
+                    self.probation[demoted] = demoted_value
+            else:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Insert or replace an entry.
+
+        Args:
+            key: Hashable key
+            value: Value to cache (treated as immutable)
+        """
+        if self.capacity <= 0:
+            return
+
+        with self.lock:
+            for segment in (self.window, self.probation, self.protected):
+                if key in segment:
+                    segment[key] = value
+                    return
+
+            self.window[key] = value
+            if len(self.window) <= self.window_capacity:
+                return
+
+            candidate, candidate_value = self.window.popitem(last=False)
+            if len(self.probation) + len(self.protected) < self.main_capacity:
+                self.probation[candidate] = candidate_value
+                return
+
+            # Exactly one entry leaves the cache: the window candidate or
+            # the main region's least recent entry, whichever is less popular
+            self.evictions += 1
+            victims = self.probation if self.probation else self.protected
+            if not victims:
+                return
+            victim = next(iter(victims))
+            if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+                del victims[victim]
+                self.probation[candidate] = candidate_value
+            else:
+                self.rejections += 1
+
+    def clear(self):
+        """Drop every entry and the access history; counters are kept."""
+        with self.lock:
+            self.window.clear()
+            self.probation.clear()
+            self.protected.clear()
+            self.sketch.clear()
+
+    def stats(self):
+        """
+        Report cache usage.
+
+        Returns:
+            Dictionary with size, capacity, hits, misses, hit rate,
+            evictions and admission rejections
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'rejections': self.rejections
+            }
+
+
+class LRUCache:
+    """
+    Fixed-size cache evicting the least recently used entry.
+
+    All operations are thread-safe.
+    """
+
+    def __init__(self, capacity):
+        """
+        Initialize the cache.
+
+        Args:
+            capacity: Maximum number of entries
+        """
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Look up a key.
+
+        Args:
+            key: Hashable key
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+    def put(self, key, value):
+        """
+        Insert or replace an entry, evicting the least recent one if full.
+
+        Args:
+            key: Hashable key
+            value: Value to cache (treated as immutable)
+        """
+        if self.capacity <= 0:
+            return
+
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry; counters are kept."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        Report cache usage.
+
+        Returns:
+            Dictionary with size, capacity, hits, misses and hit rate
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
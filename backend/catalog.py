@@ -0,0 +1,391 @@
+"""
+Compact columnar storage for the movie catalog fields returned in responses
+"""
+import json
+import re
+import numpy as np
+
+
+# Overview snippets end at a word boundary and are marked with an ellipsis
+WORD_END = re.compile(r'(?<=\S)\s')
+ELLIPSIS = '\u2026'
+
+
+class StringColumn:
+    """
+    Strings stored back to back in one UTF-8 buffer.
+
+    Value i is blob[offsets[i]:offsets[i + 1]], so a read is a slice and a
+    decode instead of a pandas row lookup. Both arrays can be saved with
+    np.save and memory-mapped back.
+    """
+
+    def __init__(self, blob, offsets):
+        """
+        Wrap existing buffers.
+
+        Args:
+            blob: uint8 array with the concatenated UTF-8 strings
+            offsets: int64 array of len(column) + 1 boundaries into blob
+        """
+        self.blob = blob
+        self.offsets = offsets
+        self.view = memoryview(blob)
+
+    @classmethod
+    def from_strings(cls, values):
+        """
+        Build a column from Python strings.
+
+        Args:
+            values: Iterable of strings
+
+        Returns:
+            StringColumn
+        """
+        encoded = [str(value).encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(blob, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        return self.blob[self.offsets[idx]:self.offsets[idx + 1]].tobytes().decode('utf-8')
+
+    def raw(self, idx):
+        """UTF-8 bytes of value idx, as a memoryview into the blob."""
+        return self.view[self.offsets[idx]:self.offsets[idx + 1]]
+
+    def __iter__(self):
+        data = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            yield data[start:stop].decode('utf-8')
+
+    def extend(self, tail):
+        """
+        Return a new column with another column's values appended.
+
+        Args:
+            tail: StringColumn to append
+
+        Returns:
+            StringColumn
+        """
+        blob = np.concatenate([self.blob, tail.blob])
+        offsets = np.concatenate([self.offsets, tail.offsets[1:] + self.offsets[-1]])
+        return StringColumn(blob, offsets)
+
+
+class WordBreaks:
+    """
+    Word-end positions of every string in a column, stored back to back.
+
+    The breaks of value i are breaks[offsets[i]:offsets[i + 1]], ascending
+    character positions where a word ends. Truncating a value to a length
+    is then a binary search instead of a scan of the text.
+    """
+
+    def __init__(self, breaks, offsets):
+        """
+        Wrap existing buffers.
+
+        Args:
+            breaks: uint32 array of word-end character positions
+            offsets: int64 array of len(column) + 1 boundaries into breaks
+        """
+        self.breaks = breaks
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values):
+        """
+        Find the word ends of each string.
+
+        Args:
+            values: Iterable of strings
+
+        Returns:
+            WordBreaks
+        """
+        positions = [[match.start() for match in WORD_END.finditer(value)] for value in values]
+        offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in positions], out=offsets[1:])
+        breaks = np.fromiter(
+            (position for value in positions for position in value),
+            dtype=np.uint32, count=int(offsets[-1])
+        )
+        return cls(breaks, offsets)
+
+    def truncate(self, idx, value, limit):
+        """
+        Shorten value idx to at most limit characters, ellipsis included.
+
+        Cuts at the last word end that fits; a first word longer than the
+        limit is cut mid-word.
+
+        Args:
+            idx: Position of the value in the column
+            value: The value itself
+            limit: Maximum length of the result
+
+        Returns:
+            The value unchanged if it fits, else the truncated value
+        """
+        if len(value) <= limit:
+            return value
+        breaks = self.breaks[self.offsets[idx]:self.offsets[idx + 1]]
+        fitting = np.searchsorted(breaks, limit - 1, side='right')
+        cut = int(breaks[fitting - 1]) if fitting else max(limit - 1, 0)
+        return value[:cut] + ELLIPSIS
+
+    def extend(self, tail):
+        """
+        Return new breaks with another column's breaks appended.
+
+        Args:
+            tail: WordBreaks to append
+
+        Returns:
+            WordBreaks
+        """
+        breaks = np.concatenate([self.breaks, tail.breaks])
+        offsets = np.concatenate([self.offsets, tail.offsets[1:] + self.offsets[-1]])
+        return WordBreaks(breaks, offsets)
+
+
+def clean_posters(posters):
+    """
+    Normalize poster URLs, mapping missing or blank values to ''.
+
+    Args:
+        posters: pandas Series of raw poster values
+
+    Returns:
+        List of stripped URL strings
+    """
+    valid = posters.notna() & (posters.astype(str).str.strip() != '') & (posters.astype(str) != 'nan')
+    return [str(poster).strip() if ok else '' for poster, ok in zip(posters, valid)]
+
+
+def json_column(column):
+    """
+    Encode every value of a column as a JSON string literal.
+
+    Args:
+        column: StringColumn
+
+    Returns:
+        StringColumn of JSON-encoded values
+    """
+    return StringColumn.from_strings(json.dumps(value, ensure_ascii=False) for value in column)
+
+
+class MovieRecord(dict):
+    """
+    Response fields of one movie, remembering which catalog row they show.
+
+    Behaves as a plain dictionary. The catalog fields listed in encoded
+    are unchanged catalog values, so the response layer copies their
+    pre-encoded JSON instead of encoding them again.
+    """
+
+    __slots__ = ('catalog', 'idx', 'encoded')
+
+    def __init__(self, catalog, idx, fields, encoded):
+        """
+        Args:
+            catalog: Catalog the movie belongs to
+            idx: Movie index
+            fields: Field name to value
+            encoded: Names of the fields holding unchanged catalog values
+        """
+        super().__init__(fields)
+        self.catalog = catalog
+        self.idx = idx
+        self.encoded = encoded
+
+    def extended(self, **fields):
+        """
+        Return a copy with fields added or replaced.
+
+        Returns:
+            MovieRecord
+        """
+        return MovieRecord(self.catalog, self.idx, {**self, **fields}, self.encoded.difference(fields))
+
+    def project(self, names):
+        """
+        Return a copy restricted to the given fields, in that order.
+
+        Args:
+            names: Field names to keep; names the movie lacks are skipped
+
+        Returns:
+            MovieRecord
+        """
+        return MovieRecord(self.catalog, self.idx, {name: self[name] for name in names if name in self}, self.encoded)
+
+    def truncated(self, limit):
+        """
+        Return a copy whose overview is cut at a word boundary.
+
+        Args:
+            limit: Maximum overview length in characters, ellipsis included
+
+        Returns:
+            MovieRecord (this one if the overview already fits)
+        """
+        overview = self.get("overview")
+        if overview is None or len(overview) <= limit:
+            return self
+        return self.extended(overview=self.catalog.overview_breaks.truncate(self.idx, overview, limit))
+
+
+class Catalog:
+    """
+    Title, overview and poster columns of the catalog, indexed by movie index.
+
+    Poster validity is precomputed, so building a response is plain
+    indexed reads with no per-field pandas access. Every column is also
+    kept JSON-encoded, so responses splice the stored bytes instead of
+    encoding the same long overviews on every request, and the word ends
+    of the overviews are precomputed for cutting snippets.
+    """
+
+    COLUMNS = ('title', 'overview', 'poster')
+
+    def __init__(self, titles, overviews, posters, has_poster, json_columns=None, overview_breaks=None):
+        """
+        Wrap existing columns.
+
+        Args:
+            titles: StringColumn of titles
+            overviews: StringColumn of overviews
+            posters: StringColumn of poster URLs ('' when missing)
+            has_poster: Boolean array, True where a poster URL exists
+            json_columns: Dictionary of column name to the JSON-encoded
+                StringColumn (default: encoded from the columns)
+            overview_breaks: WordBreaks of the overviews (default: computed
+                from the overviews)
+        """
+        self.titles = titles
+        self.overviews = overviews
+        self.posters = posters
+        self.has_poster = has_poster
+        if json_columns is None:
+            json_columns = {
+                name: json_column(column)
+                for name, column in zip(self.COLUMNS, (titles, overviews, posters))
+            }
+        self.json_columns = json_columns
+        if overview_breaks is None:
+            overview_breaks = WordBreaks.from_strings(overviews)
+        self.overview_breaks = overview_breaks
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build the catalog from a movies DataFrame.
+
+        Args:
+            df: DataFrame with 'title', 'overview' and optionally 'poster' columns
+
+        Returns:
+            Catalog
+        """
+        if 'poster' in df.columns:
+            posters = clean_posters(df['poster'])
+        else:
+            posters = [''] * len(df)
+
+        return cls(
+            StringColumn.from_strings(df['title']),
+            StringColumn.from_strings(df['overview']),
+            StringColumn.from_strings(posters),
+            np.array([bool(poster) for poster in posters], dtype=bool)
+        )
+
+    def __len__(self):
+        return len(self.titles)
+
+    def extend(self, df):
+        """
+        Return a new catalog with the movies in df appended.
+
+        Args:
+            df: DataFrame of new movies
+
+        Returns:
+            Catalog
+        """
+        tail = Catalog.from_frame(df)
+        return Catalog(
+            self.titles.extend(tail.titles),
+            self.overviews.extend(tail.overviews),
+            self.posters.extend(tail.posters),
+            np.concatenate([self.has_poster, tail.has_poster]),
+            {name: column.extend(tail.json_columns[name]) for name, column in self.json_columns.items()},
+            self.overview_breaks.extend(tail.overview_breaks)
+        )
+
+    def record(self, idx):
+        """
+        Materialize the response fields of a movie.
+
+        Args:
+            idx: Movie index
+
+        Returns:
+            MovieRecord with title, overview and, when available, poster URL
+        """
+        movie_data = {
+            "title": self.titles[idx],
+            "overview": self.overviews[idx]
+        }
+        if self.has_poster[idx]:
+            movie_data["poster"] = self.posters[idx]
+        return MovieRecord(self, idx, movie_data, frozenset(movie_data))
+
+    def arrays(self):
+        """
+        Flatten the catalog into named arrays for persistence.
+
+        Returns:
+            Dictionary of array name to numpy array
+        """
+        arrays = {'has_poster': self.has_poster}
+        for name, column in zip(self.COLUMNS, (self.titles, self.overviews, self.posters)):
+            arrays[f'{name}_blob'] = column.blob
+            arrays[f'{name}_offsets'] = column.offsets
+        for name, column in self.json_columns.items():
+            arrays[f'{name}_json_blob'] = column.blob
+            arrays[f'{name}_json_offsets'] = column.offsets
+        arrays['overview_breaks'] = self.overview_breaks.breaks
+        arrays['overview_break_offsets'] = self.overview_breaks.offsets
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, read_array):
+        """
+        Rebuild a catalog persisted with arrays().
+
+        Args:
+            read_array: Callable returning the array stored under a name
+
+        Returns:
+            Catalog
+        """
+        columns = [
+            StringColumn(read_array(f'{name}_blob'), read_array(f'{name}_offsets'))
+            for name in cls.COLUMNS
+        ]
+        json_columns = {
+            name: StringColumn(read_array(f'{name}_json_blob'), read_array(f'{name}_json_offsets'))
+            for name in cls.COLUMNS
+        }
+        overview_breaks = WordBreaks(read_array('overview_breaks'), read_array('overview_break_offsets'))
+        return cls(*columns, read_array('has_poster'), json_columns, overview_breaks)
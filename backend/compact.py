@@ -0,0 +1,197 @@
+"""
+Memory-lean representations used by the model's compact mode
+"""
+import sys
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+
+def compact_csr(matrix):
+    """
+    Store a sparse matrix with float32 values and int32 index arrays.
+
+    Args:
+        matrix: Sparse matrix
+
+    Returns:
+        CSR matrix (the input itself when it is already compact)
+    """
+    matrix = matrix.tocsr()
+    if matrix.dtype == np.float32 and matrix.indices.dtype == np.int32 and matrix.indptr.dtype == np.int32:
+        return matrix
+    if matrix.nnz > np.iinfo(np.int32).max:
+        raise ValueError("Matrix has too many values for int32 indices.")
+    return sp.csr_matrix(
+        (
+            matrix.data.astype(np.float32),
+            matrix.indices.astype(np.int32),
+            matrix.indptr.astype(np.int32)
+        ),
+        shape=matrix.shape
+    )
+
+
+def csr_nbytes(matrix):
+    """Bytes held by the value and index arrays of a CSR matrix."""
+    if matrix is None:
+        return 0
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+def python_nbytes(obj, seen=None):
+    """
+    Approximate the memory held by built-in containers and their contents.
+
+    Objects referenced from several places (e.g. the same key string in a
+    list and a dict) are counted once.
+
+    Args:
+        obj: Object to measure
+        seen: Ids of objects already counted
+
+    Returns:
+        Size in bytes
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(python_nbytes(key, seen) + python_nbytes(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(python_nbytes(item, seen) for item in obj)
+    return size
+
+
+class FrozenVocabulary:
+    """
+    Read-only term-to-column mapping backed by one sorted bytes array.
+
+    Terms are stored as fixed-width UTF-8 strings in column order, which is
+    alphabetical, so a lookup is a binary search (np.searchsorted) instead
+    of a Python dict holding one string object per term.
+    """
+
+    def __init__(self, terms):
+        """
+        Build the vocabulary.
+
+        Args:
+            terms: Terms in column order; must be sorted
+        """
+        self.terms = np.array([term.encode('utf-8') for term in terms], dtype=bytes)
+        if len(self.terms) > 1 and not np.all(self.terms[:-1] < self.terms[1:]):
+            raise ValueError("Vocabulary terms must be sorted and unique.")
+
+    @classmethod
+    def from_array(cls, terms):
+        """
+        Wrap a terms array saved from another vocabulary, without copying
+        or re-checking it (it may be a read-only memory map).
+
+        Args:
+            terms: Sorted fixed-width bytes array
+
+        Returns:
+            FrozenVocabulary
+        """
+        vocabulary = cls.__new__(cls)
+        vocabulary.terms = terms
+        return vocabulary
+
+    def __len__(self):
+        return len(self.terms)
+
+    @property
+    def nbytes(self):
+        return self.terms.nbytes
+
+    def lookup(self, tokens):
+        """
+        Map tokens to their column ids.
+
+        Args:
+            tokens: List of token strings
+
+        Returns:
+            int64 array of column ids, -1 for tokens not in the vocabulary
+        """
+        keys = np.array([token.encode('utf-8') for token in tokens], dtype=bytes)
+        if not len(self.terms) or not len(keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+
+        positions = np.searchsorted(self.terms, keys)
+        clipped = np.minimum(positions, len(self.terms) - 1)
+        return np.where(self.terms[clipped] == keys, clipped, -1).astype(np.int64)
+
+    def feature_names(self):
+        """Terms in column order, as strings."""
+        return np.array([term.decode('utf-8') for term in self.terms], dtype=object)
+
+
+class CompactTfidfVectorizer:
+    """
+    Transform-only replacement for a fitted TfidfVectorizer.
+
+    Keeps just the analyzer, a FrozenVocabulary and the IDF weights, and
+    produces the same L2-normalized TF-IDF rows as TfidfVectorizer.transform,
+    in float32. Exposes idf_, transform() and get_feature_names_out() so the
+    model can use it wherever it uses the fitted vectorizer.
+    """
+
+    def __init__(self, terms, idf, params):
+        """
+        Initialize the vectorizer.
+
+        Args:
+            terms: Vocabulary terms in column order
+            idf: IDF weight of each term
+            params: CountVectorizer parameters the vocabulary was fitted with
+        """
+        analyzer_params = {key: value for key, value in params.items() if key != 'max_features'}
+        self.analyzer = CountVectorizer(**analyzer_params).build_analyzer()
+        self.vocabulary = FrozenVocabulary(terms)
+        self.idf_ = np.asarray(idf, dtype=np.float32)
+
+    @property
+    def nbytes(self):
+        return self.vocabulary.nbytes + self.idf_.nbytes
+
+    def transform(self, raw_documents):
+        """
+        Vectorize documents.
+
+        Args:
+            raw_documents: Iterable of preprocessed text strings
+
+        Returns:
+            Sparse CSR float32 TF-IDF matrix, one L2-normalized row per document
+        """
+        indptr = [0]
+        indices = []
+        counts = []
+        for doc in raw_documents:
+            ids = self.vocabulary.lookup(self.analyzer(doc))
+            ids, doc_counts = np.unique(ids[ids >= 0], return_counts=True)
+            indices.append(ids)
+            counts.append(doc_counts)
+            indptr.append(indptr[-1] + len(ids))
+
+        indices = np.concatenate(indices).astype(np.int32) if indices else np.zeros(0, dtype=np.int32)
+        counts = np.concatenate(counts) if counts else np.zeros(0)
+        data = (counts * self.idf_[indices]).astype(np.float32)
+        matrix = sp.csr_matrix(
+            (data, indices, np.asarray(indptr, dtype=np.int32)),
+            shape=(len(indptr) - 1, len(self.vocabulary))
+        )
+        return normalize(matrix, copy=False)
+
+    def get_feature_names_out(self):
+        return self.vocabulary.feature_names()
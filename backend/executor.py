@@ -0,0 +1,135 @@
+"""
+Bounded thread pool that runs blocking model calls off the event loop
+"""
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a call is refused because the queue is full."""
+
+    def __init__(self, retry_after):
+        """
+        Args:
+            retry_after: Suggested seconds to wait before retrying
+        """
+        super().__init__("Model executor is saturated.")
+        self.retry_after = retry_after
+
+
+class ModelExecutor:
+    """
+    Runs model calls in a fixed number of worker threads.
+
+    At most max_workers calls run at once and at most max_queue more wait
+    for a thread; further calls are refused with ExecutorSaturated instead
+    of piling up, so overload turns into fast 503s rather than timeouts.
+    The event loop itself never runs model code, so cheap endpoints such as
+    /health stay responsive while the workers are busy.
+    """
+
+    def __init__(self, max_workers=4, max_queue=64):
+        """
+        Initialize the pool.
+
+        Args:
+            max_workers: Number of worker threads
+            max_queue: Calls allowed to wait for a free worker
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model')
+        self.lock = threading.Lock()
+
+        self.pending = 0
+        self.running = 0
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def retry_after(self):
+        """Seconds until the queue is expected to have drained, at least 1."""
+        average_run = self.total_run / self.completed if self.completed else 0.0
+        return max(1, math.ceil(average_run * self.pending / self.max_workers))
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) on a worker thread and await the result.
+
+        Args:
+            func: Blocking callable
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The return value of func
+
+        Raises:
+            ExecutorSaturated: If max_workers + max_queue calls are pending
+        """
+        with self.lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(self.retry_after())
+            self.pending += 1
+            self.submitted += 1
+        enqueued = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            with self.lock:
+                self.running += 1
+                self.started += 1
+                wait = started - enqueued
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.total_run += time.perf_counter() - started
+
+        def release(_):
+            with self.lock:
+                self.pending -= 1
+
+        # The slot is freed when the call itself finishes (or is cancelled
+        # before it starts), not when the awaiting coroutine gives up, so a
+        # call that keeps running after a client disconnect still counts
+        future = self.pool.submit(task)
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self):
+        """
+        Report pool usage.
+
+        Returns:
+            Dictionary with the pool limits, running and queued calls,
+            call counters and wait/run times in milliseconds
+        """
+        with self.lock:
+            return {
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'running': self.running,
+                'queued': self.pending - self.running,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_wait_ms': 1000 * self.total_wait / self.started if self.started else 0.0,
+                'max_wait_ms': 1000 * self.max_wait,
+                'avg_run_ms': 1000 * self.total_run / self.completed if self.completed else 0.0
+            }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,170 @@
+"""
+Building blocks for appending movies to a live model without a full refit
+"""
+import threading
+from contextlib import contextmanager
+import numpy as np
+import scipy.sparse as sp
+
+
+# Extra capacity reserved whenever a buffer has to grow
+GROWTH_FACTOR = 1.5
+
+
+class RunningIDF:
+    """
+    Document-frequency statistics that grow with the corpus.
+
+    Produces the same smoothed IDF as scikit-learn's TfidfTransformer,
+    idf = ln((1 + n) / (1 + df)) + 1, with features never seen in any
+    document weighted 0 so that they do not affect query norms.
+    """
+
+    def __init__(self, n_features, doc_freq=None, n_docs=0, dtype=np.float64):
+        """
+        Initialize the statistics.
+
+        Args:
+            n_features: Size of the (hashed) feature space
+            doc_freq: Optional document frequencies to start from
+            n_docs: Number of documents counted in doc_freq
+            dtype: Float type of the IDF weights
+        """
+        if doc_freq is None:
+            doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.doc_freq = np.array(doc_freq, dtype=np.int64)
+        self.n_docs = n_docs
+        self.dtype = dtype
+        self._refresh_idf()
+
+    def update(self, counts):
+        """
+        Add a batch of documents to the statistics.
+
+        Args:
+            counts: Sparse CSR term-count matrix, one row per new document
+        """
+        counts = counts.tocsr()
+        counts.sum_duplicates()
+        self.doc_freq += np.bincount(counts.indices, minlength=len(self.doc_freq))
+        self.n_docs += counts.shape[0]
+        self._refresh_idf()
+
+    def _refresh_idf(self):
+        """Recompute the IDF weights from the current statistics."""
+        seen = self.doc_freq > 0
+        self.idf = np.where(
+            seen,
+            np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1,
+            0.0
+        ).astype(self.dtype, copy=False)
+
+
+class GrowableCSR:
+    """
+    CSR matrix with spare capacity so that appending rows costs time
+    proportional to the new rows, not to the whole matrix.
+
+    The matrix property returns a CSR view over the filled part of the
+    buffers. Views handed out earlier stay valid after later appends.
+    """
+
+    def __init__(self, matrix):
+        """
+        Initialize the buffers from an existing matrix.
+
+        Args:
+            matrix: Sparse matrix holding the initial rows
+        """
+        matrix = matrix.tocsr()
+        self.n_cols = matrix.shape[1]
+        self.n_rows = matrix.shape[0]
+        self.nnz = matrix.nnz
+        self.data = matrix.data.copy()
+        self.indices = matrix.indices.copy()
+        self.indptr = matrix.indptr.copy()
+
+    def _reserve(self, n_rows, nnz):
+        """Grow the buffers so they can hold n_rows rows and nnz values."""
+        if nnz > len(self.data):
+            capacity = max(nnz, int(len(self.data) * GROWTH_FACTOR))
+            self.data = np.resize(self.data, capacity)
+            self.indices = np.resize(self.indices, capacity)
+        if n_rows + 1 > len(self.indptr):
+            capacity = max(n_rows + 1, int(len(self.indptr) * GROWTH_FACTOR))
+            self.indptr = np.resize(self.indptr, capacity)
+
+    def append(self, rows):
+        """
+        Append rows to the matrix.
+
+        Args:
+            rows: Sparse matrix with the same number of columns
+        """
+        rows = rows.tocsr()
+        n_rows = self.n_rows + rows.shape[0]
+        nnz = self.nnz + rows.nnz
+        self._reserve(n_rows, nnz)
+
+        self.data[self.nnz:nnz] = rows.data
+        self.indices[self.nnz:nnz] = rows.indices
+        self.indptr[self.n_rows + 1:n_rows + 1] = rows.indptr[1:] + self.nnz
+
+        self.n_rows = n_rows
+        self.nnz = nnz
+
+    @property
+    def matrix(self):
+        """CSR view over the rows appended so far."""
+        return sp.csr_matrix(
+            (self.data[:self.nnz], self.indices[:self.nnz], self.indptr[:self.n_rows + 1]),
+            shape=(self.n_rows, self.n_cols),
+            copy=False
+        )
+
+
+class ReadWriteLock:
+    """
+    Lock shared by any number of readers or held by a single writer.
+
+    Requests read the model concurrently while add_movies() waits for them
+    to finish and then updates it alone. A waiting writer blocks new
+    readers, so a steady stream of requests cannot starve updates.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        """Hold the lock as one of possibly many readers."""
+        with self.condition:
+            while self.writer or self.writers_waiting:
+                self.condition.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.readers -= 1
+                if not self.readers:
+                    self.condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock exclusively."""
+        with self.condition:
+            self.writers_waiting += 1
+            while self.writer or self.readers:
+                self.condition.wait()
+            self.writers_waiting -= 1
+            self.writer = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.writer = False
+                self.condition.notify_all()
@@ -0,0 +1,98 @@
+"""
+Precompiled intent detection and title extraction for chat messages
+"""
+import re
+
+
+# Chat intents, strongest first: a message that asks for recommendations or
+# a search is not a greeting even if it starts with "Hi"
+INTENTS = ('recommend', 'search', 'greeting')
+
+# One pass over the message finds every intent keyword; word boundaries
+# keep "hi" in "Whiplash" or "like" in "Likely" from counting
+INTENT_PATTERN = re.compile(
+    r"\b(?:"
+    r"(?P<recommend>recommend(?:s|ed|ations?)?|suggest(?:s|ed|ions?)?|similar|like[sd]?|enjoy(?:s|ed)?)"
+    r"|(?P<search>search(?:es|ed)?|find|look(?:ing)? for)"
+    r"|(?P<greeting>hello|hi|hey|greetings)"
+    r")\b",
+    re.IGNORECASE
+)
+
+# Phrases that introduce a title; the title is what follows the last one
+TITLE_CUE = re.compile(
+    r"\b(?:similar to|like[sd]?|recommend|suggest|enjoy(?:ed)?|watch(?:ed)?|search for|look(?:ing)? for|find)\b",
+    re.IGNORECASE
+)
+
+# Abbreviations whose full stop does not end a title
+ABBREVIATIONS = ('mr', 'mrs', 'ms', 'dr', 'st', 'jr', 'sr', 'vs', 'vol', 'pt', 'mt', 'ft', 'lt', 'sgt', 'capt', 'prof', 'gen')
+
+# A title ends at a comma, semicolon, "!" or "?", or at a full stop followed
+# by a space or the end of the message, unless the stop follows one of the
+# abbreviations or a single letter, so "Mr. Smith Goes to Washington" and
+# "L.A. Confidential" keep their dots
+TITLE_END = re.compile(
+    r"[,;!?]|" + "".join(rf"(?<!\b{abbreviation})" for abbreviation in ABBREVIATIONS) + r"(?<!\b[^\W\d_])\.(?:\s|$)",
+    re.IGNORECASE
+)
+
+# Words trimmed from either end of an extracted title, with an article in
+# front of them ("a movie about ..." becomes "about ...")
+FILLER_WORDS = frozenset({
+    'recommend', 'suggest', 'similar', 'like', 'movies', 'movie', 'film', 'films',
+    'some', 'something', 'anything', 'me', 'please'
+})
+ARTICLES = frozenset({'a', 'an'})
+
+
+def classify_intent(message):
+    """
+    Classify a chat message as a greeting, search or recommendation request.
+
+    Args:
+        message: Chat message
+
+    Returns:
+        'recommend', 'search' or 'greeting'; messages without any keyword
+        are taken as recommendation requests
+    """
+    found = {match.lastgroup for match in INTENT_PATTERN.finditer(message)}
+    for intent in INTENTS:
+        if intent in found:
+            return intent
+    return 'recommend'
+
+
+def extract_title(message):
+    """
+    Guess the movie title or description in a chat message.
+
+    Used when the message mentions no catalog title. Takes the text after
+    the last cue phrase ("like", "similar to", ...) up to the end of the
+    clause, or the whole message if it has no cue, and trims filler words
+    from both ends.
+
+    Args:
+        message: Chat message
+
+    Returns:
+        Extracted text, or None if fewer than two characters remain
+    """
+    last_cue = None
+    for last_cue in TITLE_CUE.finditer(message):
+        pass
+    text = message[last_cue.end():] if last_cue is not None else message
+
+    end = TITLE_END.search(text)
+    if end is not None:
+        text = text[:end.start()]
+
+    words = text.split()
+    while words and (words[0].lower() in FILLER_WORDS or (
+            words[0].lower() in ARTICLES and len(words) > 1 and words[1].lower() in FILLER_WORDS)):
+        words.pop(0)
+    while words and words[-1].lower() in FILLER_WORDS:
+        words.pop()
+    title = " ".join(words).strip(" '\"")
+    return title if len(title) >= 2 else None
@@ -0,0 +1,42 @@
+"""
+Push newly ingested movies to a running API server so it can add them
+without a restart (requires the server to run with MOVIE_VECTORIZER=hashing
+and the same MOVIE_ADMIN_TOKEN)
+"""
+import os
+import requests
+
+# Base URL of the running API, e.g. http://127.0.0.1:8000 (unset disables pushing)
+MOVIE_API_URL = os.getenv("MOVIE_API_URL")
+
+# Admin token of the running API, sent as the X-Admin-Token header
+ADMIN_TOKEN = os.getenv("MOVIE_ADMIN_TOKEN")
+
+
+def push_movies_to_server(movies):
+    """
+    Send new movies to the running server's POST /movies endpoint.
+    
+    Args:
+        movies: List of movie dicts with 'title' and 'overview' (and optionally 'poster')
+        
+    Returns:
+        True if the server added the movies, False otherwise
+    """
+    if not MOVIE_API_URL:
+        return False
+    
+    payload = [
+        {key: movie[key] for key in ('title', 'overview', 'poster') if movie.get(key)}
+        for movie in movies
+    ]
+    headers = {"X-Admin-Token": ADMIN_TOKEN} if ADMIN_TOKEN else {}
+    try:
+        response = requests.post(f"{MOVIE_API_URL.rstrip('/')}/movies", json=payload, headers=headers, timeout=60)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"\n   ⚠️  Could not update the running server: {str(e)}")
+        return False
+    
+    print(f"\n   🔄 Running server updated: {response.json().get('added', 0)} movies added without a restart")
+    return True
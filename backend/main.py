@@ -1,11 +1,23 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, StrictInt, StrictStr
 from model import MovieRecommendationModel
-from typing import Optional
+from executor import ModelExecutor, ExecutorSaturated
+from batching import RequestCoalescer
+from singleflight import SingleFlight
+from title_index import normalize_title
+from responses import FastJSONResponse, render
+from intent import classify_intent, extract_title
+from typing import List, Optional, Union
 import uvicorn
+import hmac
 import random
-import pandas as pd
+import os
+import time
+import asyncio
+import threading
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -23,13 +35,113 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global model instance
+# Global model instance. A reload replaces it with a single reference
+# assignment, so request handlers read it once and use that snapshot
 model = None
 
+# Model configuration (overridable through environment variables)
+MOVIES_CSV = os.getenv("MOVIES_CSV", "movies.csv")
+# Precomputed neighbors per movie; covers the maximum /recommend limit
+NEIGHBORS_K = int(os.getenv("MOVIE_NEIGHBORS_K", "20"))
+# Similarity search backend: "exact" or "ivf" (approximate, for large catalogs)
+INDEX_MODE = os.getenv("MOVIE_INDEX", "exact")
+ANN_LISTS = int(os.getenv("MOVIE_ANN_LISTS", "0")) or None
+ANN_PROBES = int(os.getenv("MOVIE_ANN_PROBES", "8"))
+# Persisted model artifact reused across restarts while movies.csv is unchanged
+# (set to an empty string to always fit at startup)
+ARTIFACT_DIR = os.getenv("MOVIE_ARTIFACT_DIR", "model_artifact")
+# Dense TruncatedSVD embedding size; 0 keeps the sparse TF-IDF representation
+EMBEDDING_DIM = int(os.getenv("MOVIE_EMBEDDING_DIM", "0"))
+# "tfidf" fits a vocabulary; "hashing" allows adding movies without a restart
+VECTORIZER_MODE = os.getenv("MOVIE_VECTORIZER", "tfidf")
+# Worker processes for preprocessing large catalogs (-1 uses all cores)
+N_JOBS = int(os.getenv("MOVIE_N_JOBS", "1"))
+# float32 matrices, array-backed vocabulary and no DataFrame, to fit more workers in RAM
+COMPACT = os.getenv("MOVIE_COMPACT", "0") == "1"
+# Recommendation results kept in the in-process cache (0 disables it)
+CACHE_SIZE = int(os.getenv("MOVIE_CACHE_SIZE", "1024"))
+# Free-text query vectors kept in an LRU cache (0 disables it)
+QUERY_CACHE_SIZE = int(os.getenv("MOVIE_QUERY_CACHE_SIZE", "256"))
+# Seconds between checks of movies.csv for changes that trigger a background
+# reload (0 disables the watcher)
+WATCH_INTERVAL = float(os.getenv("MOVIE_WATCH_INTERVAL", "0"))
+# Token required in the X-Admin-Token header of admin endpoints (empty:
+# admin endpoints are disabled)
+ADMIN_TOKEN = os.getenv("MOVIE_ADMIN_TOKEN", "")
+
+# Model calls run on a bounded thread pool: at most MAX_CONCURRENCY at once,
+# MAX_QUEUE more waiting, and anything beyond that is refused with a 503
+MAX_CONCURRENCY = int(os.getenv("MOVIE_MAX_CONCURRENCY", "4"))
+MAX_QUEUE = int(os.getenv("MOVIE_MAX_QUEUE", "64"))
+executor = ModelExecutor(max_workers=MAX_CONCURRENCY, max_queue=MAX_QUEUE)
+# Title recommendations that the cache and neighbor table cannot answer and
+# that arrive within BATCH_WINDOW_MS of each other are scored together in
+# one matrix product, up to BATCH_MAX per batch (0 disables batching)
+BATCH_WINDOW_MS = float(os.getenv("MOVIE_BATCH_WINDOW_MS", "2"))
+BATCH_MAX = int(os.getenv("MOVIE_BATCH_MAX", "32"))
+# Largest number of items accepted by POST /recommend/batch
+BATCH_REQUEST_MAX = int(os.getenv("MOVIE_BATCH_REQUEST_MAX", "100"))
+# Responses of at least this many bytes are gzip-compressed for clients
+# that accept it (0 disables compression)
+GZIP_MIN_SIZE = int(os.getenv("MOVIE_GZIP_MIN_SIZE", "1000"))
+
+
+class StreamingGZipMiddleware(GZipMiddleware):
+    """
+    GZip compression that leaves /api/chat/stream alone, so that each
+    event reaches the client as soon as it is sent.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/api/chat/stream":
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+if GZIP_MIN_SIZE > 0:
+    app.add_middleware(StreamingGZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=6)
+
+# Movie fields that can be selected with fields=
+MOVIE_FIELDS = ("title", "overview", "poster", "similarity_score")
+
+# Background reloads run one at a time; the status is reported by /health
+reload_lock = threading.Lock()
+reload_status = {
+    "in_progress": False,
+    "reloads": 0,
+    "last_started": None,
+    "last_finished": None,
+    "last_error": None
+}
+watcher_task = None
+
 # Request models
 class ChatMessage(BaseModel):
     message: str
     type: Optional[str] = "auto"
+    # Titles already shown in this chat session, skipped in new recommendations
+    exclude: Optional[List[str]] = None
+    # Movie fields to return and overview length (default: everything)
+    fields: Optional[List[str]] = None
+    overview_chars: Optional[int] = Field(None, ge=1)
+
+class BatchItem(BaseModel):
+    # Title, or movie id (movie_id of an earlier response) when given as a
+    # number; strict, so that true is not taken as id 1
+    movie: Union[StrictInt, StrictStr]
+    limit: int = 5
+    exclude: Optional[List[str]] = None
+
+class BatchRecommendRequest(BaseModel):
+    items: List[BatchItem]
+    fields: Optional[List[str]] = None
+    overview_chars: Optional[int] = Field(None, ge=1)
+
+class NewMovie(BaseModel):
+    title: str = Field(..., min_length=1)
+    overview: str = Field(..., min_length=1)
+    poster: Optional[str] = None
 
 # AI responses for more conversational feel
 GREETINGS = [
@@ -44,6 +156,11 @@ AI_RESPONSES = {
         "Great choice! If you enjoyed \"{movie}\", I think you'll love these similar films:",
         "Analyzing \"{movie}\"... Perfect! Here are some movies I think match your taste:"
     ],
+    "description_intro": [
+        "I couldn't find a movie called \"{query}\", but these films match that description:",
+        "Looking for something like \"{query}\"? These movies fit the bill:",
+        "Here are some movies whose stories match \"{query}\":"
+    ],
     "recommendation_explanation": [
         "I recommend \"{title}\" because it shares similar themes and storytelling style. Similarity: {score:.0%}",
         "\"{title}\" is a great match! It has comparable narrative elements. Match: {score:.0%}",
@@ -61,14 +178,123 @@ AI_RESPONSES = {
     ]
 }
 
+def configured_model():
+    """Construct an unfitted model from the configuration."""
+    return MovieRecommendationModel(
+        csv_path=MOVIES_CSV,
+        neighbors_k=NEIGHBORS_K,
+        index=INDEX_MODE,
+        ann_lists=ANN_LISTS,
+        ann_probes=ANN_PROBES,
+        embedding_dim=EMBEDDING_DIM,
+        vectorizer_mode=VECTORIZER_MODE,
+        n_jobs=N_JOBS,
+        compact=COMPACT,
+        cache_size=CACHE_SIZE,
+        query_cache_size=QUERY_CACHE_SIZE
+    )
+
+
+def create_model():
+    """
+    Construct a model from the configuration and fit or load it.
+    
+    Returns:
+        Ready-to-serve MovieRecommendationModel
+    """
+    new_model = configured_model()
+    if ARTIFACT_DIR:
+        new_model.load_or_build(ARTIFACT_DIR)
+    else:
+        new_model.load_data()
+        new_model.build_model()
+    return new_model
+
+
+def prepare_artifact():
+    """
+    Build or refresh the persisted model artifact without serving it.
+    
+    Called by run_server.py before it starts several workers, so that the
+    workers only memory-map the artifact instead of each fitting a model.
+    """
+    if not ARTIFACT_DIR:
+        raise ValueError("Serving with several workers requires MOVIE_ARTIFACT_DIR.")
+    configured_model().load_or_build(ARTIFACT_DIR)
+
+
+def rebuild_and_swap():
+    """
+    Build a fresh model and publish it by replacing the global reference.
+    
+    Runs in a background thread while the current model keeps serving;
+    requests already running finish on the model they started with. If
+    the build fails, the current model stays in place. Must be called
+    with reload_lock held, which it releases.
+    """
+    global model
+    reload_status.update(in_progress=True, last_started=time.time(), last_error=None)
+    try:
+        new_model = create_model()
+        model = new_model
+        reload_status["reloads"] += 1
+        print(f"Model reloaded (version {new_model.version}).")
+    except Exception as e:
+        reload_status["last_error"] = str(e)
+        print(f"Error reloading model, keeping the current one: {str(e)}")
+    finally:
+        reload_status.update(in_progress=False, last_finished=time.time())
+        reload_lock.release()
+
+
+def start_reload():
+    """
+    Start a background reload unless one is already running.
+    
+    Returns:
+        True if a reload was started
+    """
+    if not reload_lock.acquire(blocking=False):
+        return False
+    threading.Thread(target=rebuild_and_swap, name="model-reload", daemon=True).start()
+    return True
+
+
+def csv_mtime():
+    """Modification time of the movies CSV, or None if it is missing."""
+    try:
+        return os.stat(MOVIES_CSV).st_mtime_ns
+    except OSError:
+        return None
+
+
+async def watch_movies_csv():
+    """Reload the model whenever movies.csv changes."""
+    last_seen = csv_mtime()
+    pending = None
+    while True:
+        await asyncio.sleep(WATCH_INTERVAL)
+        current = csv_mtime()
+        if current is None or current == last_seen:
+            pending = None
+            continue
+        # Wait until the file has stopped changing for one interval, so a
+        # reload never reads a half-written CSV
+        if current != pending:
+            pending = current
+            continue
+        if start_reload():
+            print("movies.csv changed, reloading the model in the background.")
+            last_seen = current
+            pending = None
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the recommendation model on server startup."""
-    global model
+    global model, watcher_task
     try:
-        model = MovieRecommendationModel(csv_path='movies.csv')
-        model.load_data()
-        model.build_model()
+        model = create_model()
         print("Movie recommendation model initialized successfully!")
     except FileNotFoundError as e:
         print(f"Warning: {str(e)}")
@@ -77,6 +303,166 @@ async def startup_event():
     except Exception as e:
         print(f"Error initializing model: {str(e)}")
         model = None
+    
+    if WATCH_INTERVAL > 0:
+        watcher_task = asyncio.create_task(watch_movies_csv())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the model worker threads."""
+    executor.shutdown()
+
+
+async def run_model_call(func, *args, **kwargs):
+    """
+    Run a blocking model call on the executor, off the event loop.
+    
+    Raises:
+        HTTPException: 503 with a Retry-After header when the executor queue is full
+    """
+    try:
+        return await executor.run(func, *args, **kwargs)
+    except ExecutorSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+async def run_recommendation_batch(snapshot, requests):
+    """Run a batch of (title, limit, exclude) requests as one model call."""
+    return await run_model_call(snapshot.get_recommendations_batch, requests)
+
+
+coalescer = RequestCoalescer(run_recommendation_batch, window_ms=BATCH_WINDOW_MS, max_batch=BATCH_MAX)
+
+# Identical recommendation and search requests that arrive while one is
+# being computed wait for that computation instead of repeating it
+flights = SingleFlight()
+
+
+async def compute_recommendations(snapshot, movie, limit, exclude):
+    """
+    Get recommendations for a title, batched with concurrent requests.
+    
+    Requests answered by the result cache or the neighbor table return at
+    once; only seeds that must be scored wait for a batch. Requests are
+    grouped per model snapshot, so a batch never mixes models across a
+    reload.
+    """
+    if BATCH_WINDOW_MS <= 0:
+        return await run_model_call(snapshot.get_recommendations, movie, limit=limit, exclude=exclude)
+    result = await run_model_call(snapshot.get_cached_recommendations, movie, limit=limit, exclude=exclude)
+    if result is not None:
+        return result
+    return await coalescer.submit(snapshot, (movie, limit, exclude))
+
+
+async def recommend_title(snapshot, movie, limit, exclude):
+    """
+    Get recommendations for a title, sharing the work with identical
+    requests in flight.
+    
+    Requests are identical when they hold the same model snapshot and
+    version, the same normalized title, limit and exclusions. The shared
+    result must not be modified.
+    """
+    key = ("recommend", snapshot, snapshot.version, normalize_title(movie), limit, snapshot.exclusion_key(exclude))
+    result = await flights.do(key, compute_recommendations, snapshot, movie, limit, exclude)
+    if "error" in result and result["requested_movie"] != movie:
+        # Shared with a request that spelled the title differently
+        return snapshot.title_not_found(movie)
+    return result
+
+
+def find_movies(snapshot, query, limit):
+    """Catalog fields of the movies whose titles match a search query."""
+    return [snapshot.movie_info(idx) for idx in snapshot.search_titles(query, limit=limit)]
+
+
+def parse_fields(fields, allowed=MOVIE_FIELDS):
+    """
+    Validate a selection of movie fields.
+    
+    Args:
+        fields: Comma-separated field names, a list of names, or None
+        allowed: Field names that may be selected
+    
+    Returns:
+        Tuple of field names, or None to keep every field
+    
+    Raises:
+        HTTPException: 400 for an unknown field
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    names = tuple(dict.fromkeys(name.strip() for name in fields if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(allowed)}"
+        )
+    return names or None
+
+
+def shape_movies(movies, fields=None, overview_chars=None):
+    """
+    Select fields and shorten overviews of movie records.
+    
+    Overviews are cut at precomputed word boundaries. The records may be
+    shared with other requests, so new ones are returned.
+    
+    Args:
+        movies: List of MovieRecords
+        fields: Tuple of field names to keep, or None for every field
+        overview_chars: Maximum overview length, or None for the full text
+    
+    Returns:
+        List of MovieRecords
+    """
+    if fields is None and overview_chars is None:
+        return movies
+    
+    shaped = []
+    for movie in movies:
+        if overview_chars is not None:
+            movie = movie.truncated(overview_chars)
+        if fields is not None:
+            movie = movie.project(fields)
+        shaped.append(movie)
+    return shaped
+
+
+def check_admin_token(token):
+    """
+    Allow an admin request only with the configured admin token.
+    
+    Args:
+        token: Value of the X-Admin-Token header
+    
+    Raises:
+        HTTPException: 403 when no admin token is configured or the token
+            does not match
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled. Set MOVIE_ADMIN_TOKEN to enable them.")
+    # Constant-time comparison, so the token cannot be guessed from response times
+    if token is None or not hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+async def search_titles(snapshot, query, limit):
+    """
+    Search movie titles on the executor, sharing the work with identical
+    searches in flight. The shared result must not be modified.
+    """
+    key = ("search", snapshot, snapshot.version, normalize_title(query), limit)
+    return await flights.do(key, run_model_call, find_movies, snapshot, query, limit)
 
 
 @app.get("/")
@@ -93,7 +479,10 @@ async def root():
 @app.get("/recommend")
 async def recommend(
     movie: str = Query(..., description="Title of the movie to get recommendations for"),
-    limit: int = Query(5, ge=1, le=20, description="Number of recommendations to return (1-20)")
+    limit: int = Query(5, ge=1, le=20, description="Number of recommendations to return (1-20)"),
+    exclude: Optional[List[str]] = Query(None, description="Titles to leave out of the recommendations"),
+    fields: Optional[str] = Query(None, description="Comma-separated movie fields to return: title, overview, poster, similarity_score"),
+    overview_chars: Optional[int] = Query(None, ge=1, description="Cut overviews to at most this many characters")
 ):
     """
     Get movie recommendations based on a movie title.
@@ -101,187 +490,462 @@ async def recommend(
     Args:
         movie: Title of the movie (case-insensitive, supports partial matches)
         limit: Number of recommendations to return (default: 5, max: 20)
+        exclude: Titles to leave out of the recommendations
+        fields: Movie fields to return (default: all)
+        overview_chars: Maximum overview length, cut at a word boundary
     
     Returns:
         Dictionary containing the requested movie and recommendations
     """
-    if model is None:
+    snapshot = model
+    if snapshot is None:
         raise HTTPException(
             status_code=503,
             detail="Recommendation model is not loaded. Please ensure movies.csv exists."
         )
+    fields = parse_fields(fields)
     
     try:
-        result = model.get_recommendations(movie, limit=limit)
+        result = await recommend_title(snapshot, movie, limit, exclude)
         
         # Check if movie was found
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
         
-        return result
+        return FastJSONResponse({
+            **result,
+            "recommendations": shape_movies(result["recommendations"], fields, overview_chars)
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@app.post("/api/chat")
-async def chat_endpoint(chat_message: ChatMessage):
+@app.post("/recommend/batch")
+async def recommend_batch(batch: BatchRecommendRequest):
     """
-    AI chat endpoint for conversational movie recommendations.
+    Get recommendations for many movies in one call.
+    
+    Every item is resolved and scored in a single model call. Items that
+    fail (unknown title or id, invalid limit) get an error entry in their
+    place while the others are answered normally.
     
     Expected format:
     {
-        "message": "I like The Matrix",
-        "type": "recommend" or "search" or "greeting" (optional, auto-detected if not provided)
+        "items": [
+            {"movie": "The Matrix", "limit": 5},
+            {"movie": 42, "limit": 10, "exclude": ["Alien"]}
+        ],
+        "fields": ["title", "similarity_score"] (optional),
+        "overview_chars": 200 (optional)
     }
+    
+    Returns:
+        Dictionary with one result per item, in request order, and the
+        number of items that succeeded
     """
-    if model is None:
+    snapshot = model
+    if snapshot is None:
         raise HTTPException(
             status_code=503,
-            detail="Recommendation model is not loaded."
+            detail="Recommendation model is not loaded. Please ensure movies.csv exists."
         )
     
-    user_message = chat_message.message.strip().lower()
-    msg_type = chat_message.type or "auto"
+    if not batch.items:
+        raise HTTPException(status_code=400, detail="No items to recommend for.")
+    if len(batch.items) > BATCH_REQUEST_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items: at most {BATCH_REQUEST_MAX} per batch."
+        )
+    fields = parse_fields(batch.fields)
     
-    try:
-        # Auto-detect intent if not specified
-        if msg_type == "auto":
-            if any(word in user_message for word in ["hello", "hi", "hey", "greetings"]):
-                msg_type = "greeting"
-            elif any(word in user_message for word in ["recommend", "suggest", "similar", "like", "enjoyed"]):
-                msg_type = "recommend"
-            elif any(word in user_message for word in ["search", "find", "look for"]):
-                msg_type = "search"
-            else:
-                msg_type = "recommend"  # Default to recommendation
-        
-        # Handle greeting
-        if msg_type == "greeting":
-            return {
-                "type": "greeting",
-                "message": random.choice(GREETINGS),
-                "timestamp": None
-            }
-        
-        # Extract movie title from message
-        # Try to find movie titles in the message
-        movie_title = None
-        
-        # Common patterns
-        patterns = [
-            "like (.+?)(?:,|$|!|.)",
-            "recommend (.+?)(?:,|$|!|.)",
-            "suggest (.+?)(?:,|$|!|.)",
-            "similar to (.+?)(?:,|$|!|.)",
-            "enjoyed (.+?)(?:,|$|!|.)",
-            "watch (.+?)(?:,|$|!|.)",
-            "search for (.+?)(?:,|$|!|.)",
-            "find (.+?)(?:,|$|!|.)",
-        ]
-        
-        import re
-        for pattern in patterns:
-            match = re.search(pattern, user_message, re.IGNORECASE)
-            if match:
-                movie_title = match.group(1).strip()
-                break
-        
-        # If no pattern matched, try the whole message
-        if not movie_title:
-            # Remove common words
-            words_to_remove = ["recommend", "suggest", "similar", "like", "movies", "movie", "film", "films"]
-            words = user_message.split()
-            movie_title = " ".join([w for w in words if w.lower() not in words_to_remove])
-        
-        if not movie_title or len(movie_title) < 2:
-            return {
-                "type": "error",
-                "message": "I'd love to help! Could you tell me a movie title you'd like recommendations for?",
-                "timestamp": None
+    results = [None] * len(batch.items)
+    requests = []
+    positions = []
+    for position, item in enumerate(batch.items):
+        if not 1 <= item.limit <= 20:
+            results[position] = {
+                "error": "limit must be between 1 and 20.",
+                "requested_movie": item.movie,
+                "recommendations": []
             }
+            continue
+        requests.append((item.movie, item.limit, item.exclude))
+        positions.append(position)
+    
+    try:
+        if requests:
+            answers = await run_model_call(snapshot.get_recommendations_batch, requests)
+            for position, answer in zip(positions, answers):
+                if "error" not in answer:
+                    answer = {
+                        **answer,
+                        "recommendations": shape_movies(answer["recommendations"], fields, batch.overview_chars)
+                    }
+                results[position] = answer
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    return FastJSONResponse({
+        "results": results,
+        "count": len(results),
+        "found": sum(1 for result in results if "error" not in result)
+    })
+
+
+@app.get("/recommend/text")
+async def recommend_text(
+    query: str = Query(..., description="Free-text description of the wanted movie"),
+    limit: int = Query(5, ge=1, le=20, description="Number of recommendations to return (1-20)"),
+    exclude: Optional[List[str]] = Query(None, description="Titles to leave out of the recommendations"),
+    fields: Optional[str] = Query(None, description="Comma-separated movie fields to return: title, overview, poster, similarity_score"),
+    overview_chars: Optional[int] = Query(None, ge=1, description="Cut overviews to at most this many characters")
+):
+    """
+    Get movie recommendations for a free-text description.
+    
+    Args:
+        query: Description such as "a heist movie in space"
+        limit: Number of recommendations to return (default: 5, max: 20)
+        exclude: Titles to leave out of the recommendations
+        fields: Movie fields to return (default: all)
+        overview_chars: Maximum overview length, cut at a word boundary
+    
+    Returns:
+        Dictionary containing the query and recommendations
+    """
+    snapshot = model
+    if snapshot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Recommendation model is not loaded. Please ensure movies.csv exists."
+        )
+    fields = parse_fields(fields)
+    
+    try:
+        result = await run_model_call(snapshot.recommend_text, query, limit=limit, exclude=exclude)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    
+    return FastJSONResponse({
+        **result,
+        "recommendations": shape_movies(result["recommendations"], fields, overview_chars)
+    })
+
+
+async def chat_intent(snapshot, chat_message):
+    """
+    Work out what a chat message asks for.
+    
+    The intent comes from one precompiled keyword pattern; the movie is
+    the longest catalog title found in the message, spotted in a single
+    pass, or else the text after the last cue phrase ("like", "similar
+    to", ...), which may be a misspelled title or a description.
+    
+    Args:
+        snapshot: Model whose catalog titles are spotted
+        chat_message: ChatMessage
+    
+    Returns:
+        Tuple of (message type, movie title): the type is "greeting",
+        "search" or "recommend"; the title is None for greetings and for
+        messages that name no movie
+    """
+    message = chat_message.message.strip()
+    msg_type = chat_message.type or "auto"
+    
+    if msg_type == "auto":
+        msg_type = classify_intent(message)
+    if msg_type == "greeting":
+        return msg_type, None
+    if msg_type != "search":
+        msg_type = "recommend"
+    
+    movie_idx = await run_model_call(snapshot.spot_title, message)
+    if movie_idx is not None:
+        return msg_type, snapshot.catalog.titles[movie_idx]
+    return msg_type, extract_title(message)
+
+
+def explain(rec):
+    """Add a conversational explanation to a recommended movie."""
+    explanation = random.choice(AI_RESPONSES["recommendation_explanation"]).format(
+        title=rec["title"],
+        score=rec["similarity_score"]
+    )
+    return rec.extended(explanation=explanation)
+
+
+async def recommend_description(snapshot, text, exclude):
+    """
+    Recommend movies for a chat message that names no known title, by
+    treating the message as a description.
+    
+    Returns:
+        Result dictionary shaped like get_recommendations(), with match
+        type "description", or None if no movie matches
+    """
+    result = await run_model_call(snapshot.recommend_text, text, limit=5, exclude=exclude)
+    if "error" in result:
+        return None
+    return {
+        "requested_movie": text,
+        "match_type": "description",
+        "match_confidence": None,
+        "recommendations": result["recommendations"]
+    }
+
+
+def chat_message_reply(msg_type, movie_title):
+    """
+    Reply to a chat message that needs no model call: a greeting or a
+    message that names no movie.
+    
+    Returns:
+        Response dictionary, or None if the message needs the model
+    """
+    if msg_type == "greeting":
+        return {
+            "type": "greeting",
+            "message": random.choice(GREETINGS),
+            "timestamp": None
+        }
+    if movie_title is None:
+        return {
+            "type": "error",
+            "message": "I'd love to help! Could you tell me a movie title you'd like recommendations for?",
+            "timestamp": None
+        }
+    return None
+
+
+def not_found_reply(movie_title):
+    """Reply to a chat message whose movie matches neither a title nor a description."""
+    return {
+        "type": "error",
+        "message": random.choice(AI_RESPONSES["error_not_found"]).format(movie=movie_title),
+        "timestamp": None
+    }
+
+
+async def chat_reply(snapshot, chat_message, msg_type, movie_title, fields=None, overview_chars=None):
+    """
+    Answer a chat message.
+    
+    Args:
+        snapshot: Model to answer with
+        chat_message: ChatMessage
+        msg_type: Message type from chat_intent()
+        movie_title: Movie title from chat_intent()
+        fields: Movie fields to return, or None for every field
+        overview_chars: Maximum overview length, or None for the full text
+    
+    Returns:
+        Response dictionary
+    """
+    reply = chat_message_reply(msg_type, movie_title)
+    if reply is not None:
+        return reply
+    
+    # Handle search
+    if msg_type == "search":
+        results = shape_movies(await search_titles(snapshot, movie_title, 10), fields, overview_chars)
         
-        # Handle search
-        if msg_type == "search":
-            query_lower = movie_title.lower()
-            matches = model.df[
-                model.df['title'].str.lower().str.contains(query_lower, na=False)
-            ].head(10)
-            
-            if matches.empty:
-                return {
-                    "type": "search_results",
-                    "message": f"I couldn't find any movies matching '{movie_title}'. Try a different search!",
-                    "movies": [],
-                    "timestamp": None
-                }
-            
-            results = []
-            for idx, row in matches.iterrows():
-                movie_data = {
-                    "title": row['title'],
-                    "overview": row['overview']
-                }
-                # Add poster URL if available
-                if 'poster' in matches.columns and pd.notna(row.get('poster')) and str(row.get('poster')).strip() and str(row.get('poster')) != 'nan':
-                    movie_data["poster"] = str(row['poster']).strip()
-                results.append(movie_data)
-            
+        if not results:
             return {
                 "type": "search_results",
-                "message": f"I found {len(results)} movies matching '{movie_title}':",
-                "movies": results,
-                "timestamp": None
-            }
-        
-        # Handle recommendation
-        result = model.get_recommendations(movie_title, limit=5)
-        
-        if "error" in result:
-            error_msg = random.choice(AI_RESPONSES["error_not_found"]).format(movie=movie_title)
-            return {
-                "type": "error",
-                "message": error_msg,
+                "message": f"I couldn't find any movies matching '{movie_title}'. Try a different search!",
+                "movies": [],
                 "timestamp": None
             }
         
+        return {
+            "type": "search_results",
+            "message": f"I found {len(results)} movies matching '{movie_title}':",
+            "movies": results,
+            "timestamp": None
+        }
+    
+    # Handle recommendation
+    result = await recommend_title(snapshot, movie_title, 5, chat_message.exclude)
+    
+    if "error" in result:
+        # No title matched: treat the message as a description instead
+        result = await recommend_description(snapshot, movie_title, chat_message.exclude)
+        if result is None:
+            return not_found_reply(movie_title)
+        intro = random.choice(AI_RESPONSES["description_intro"]).format(query=movie_title)
+    else:
         # Create AI response
         intro = random.choice(AI_RESPONSES["recommendation_intro"]).format(movie=result["requested_movie"])
+    
+    # Add explanations for each recommendation
+    recommendations_with_explanations = shape_movies(
+        [explain(rec) for rec in result["recommendations"]], fields, overview_chars
+    )
+    
+    return {
+        "type": "recommendations",
+        "message": intro,
+        "requested_movie": result["requested_movie"],
+        "match_type": result["match_type"],
+        "match_confidence": result["match_confidence"],
+        "recommendations": recommendations_with_explanations,
+        "timestamp": None
+    }
+
+
+def chat_error_reply(error):
+    """Reply to a chat message whose handling failed."""
+    return {
+        "type": "error",
+        "message": random.choice(AI_RESPONSES["error_general"]),
+        "error": str(error),
+        "timestamp": None
+    }
+
+
+@app.post("/api/chat")
+async def chat_endpoint(chat_message: ChatMessage):
+    """
+    AI chat endpoint for conversational movie recommendations.
+    
+    Expected format:
+    {
+        "message": "I like The Matrix",
+        "type": "recommend" or "search" or "greeting" (optional, auto-detected if not provided)
+    }
+    """
+    snapshot = model
+    if snapshot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Recommendation model is not loaded."
+        )
+    
+    fields = parse_fields(chat_message.fields, allowed=MOVIE_FIELDS + ("explanation",))
+    
+    try:
+        msg_type, movie_title = await chat_intent(snapshot, chat_message)
+        return FastJSONResponse(await chat_reply(
+            snapshot, chat_message, msg_type, movie_title, fields, chat_message.overview_chars
+        ))
+    except HTTPException:
+        raise
+    except Exception as e:
+        return chat_error_reply(e)
+
+
+def sse_event(event, data):
+    """Frame one Server-Sent Event; encoded JSON never contains a newline."""
+    return b"event: " + event.encode() + b"\ndata: " + render(data) + b"\n\n"
+
+
+async def chat_events(snapshot, chat_message, fields, overview_chars):
+    """
+    Produce the Server-Sent Events of a streamed chat reply.
+    
+    A recommendation reply starts with an "intro" event as soon as the
+    title is resolved, before the catalog is scored, followed by one
+    "recommendation" event per movie and a final "done" event. Any other
+    reply is sent whole as one "message" event, followed by "done".
+    Failures after the stream started are sent as an "error" event.
+    """
+    try:
+        msg_type, movie_title = await chat_intent(snapshot, chat_message)
+        if msg_type == "search" or chat_message_reply(msg_type, movie_title) is not None:
+            yield sse_event("message", await chat_reply(
+                snapshot, chat_message, msg_type, movie_title, fields, overview_chars
+            ))
+            yield sse_event("done", {"count": 0})
+            return
         
-        # Add explanations for each recommendation
-        recommendations_with_explanations = []
-        for rec in result["recommendations"]:
-            explanation = random.choice(AI_RESPONSES["recommendation_explanation"]).format(
-                title=rec["title"],
-                score=rec["similarity_score"]
-            )
-            recommendations_with_explanations.append({
-                **rec,
-                "explanation": explanation
+        match = await run_model_call(snapshot.match_title, movie_title)
+        if match is None:
+            # No title matched: the description has to be scored first
+            result = await recommend_description(snapshot, movie_title, chat_message.exclude)
+            if result is None:
+                yield sse_event("message", not_found_reply(movie_title))
+                yield sse_event("done", {"count": 0})
+                return
+            yield sse_event("intro", {
+                "type": "recommendations",
+                "message": random.choice(AI_RESPONSES["description_intro"]).format(query=movie_title),
+                "requested_movie": result["requested_movie"],
+                "match_type": result["match_type"],
+                "match_confidence": result["match_confidence"],
+                "timestamp": None
             })
+            recommendations = result["recommendations"]
+        else:
+            movie_idx, match_type, match_confidence = match
+            requested_movie = snapshot.catalog.titles[movie_idx]
+            yield sse_event("intro", {
+                "type": "recommendations",
+                "message": random.choice(AI_RESPONSES["recommendation_intro"]).format(movie=requested_movie),
+                "requested_movie": requested_movie,
+                "match_type": match_type,
+                "match_confidence": round(match_confidence, 3),
+                "timestamp": None
+            })
+            indices, scores = await run_model_call(
+                snapshot.recommend_indices, movie_idx, 5, chat_message.exclude
+            )
+            recommendations = (
+                snapshot.recommendation_list([idx], [score])[0] for idx, score in zip(indices, scores)
+            )
         
-        return {
-            "type": "recommendations",
-            "message": intro,
-            "requested_movie": result["requested_movie"],
-            "recommendations": recommendations_with_explanations,
-            "timestamp": None
-        }
-        
+        count = 0
+        for rec in recommendations:
+            yield sse_event("recommendation", shape_movies([explain(rec)], fields, overview_chars)[0])
+            count += 1
+        yield sse_event("done", {"count": count})
     except Exception as e:
-        error_msg = random.choice(AI_RESPONSES["error_general"])
-        return {
-            "type": "error",
-            "message": error_msg,
-            "error": str(e),
-            "timestamp": None
-        }
+        yield sse_event("error", chat_error_reply(e))
+
+
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(chat_message: ChatMessage):
+    """
+    Streaming variant of /api/chat, sent as Server-Sent Events.
+    
+    Takes the same request body. The intro line arrives as soon as the
+    title is resolved and each recommendation as it is ready, so clients
+    can render the reply before scoring finishes. See chat_events() for
+    the event sequence.
+    """
+    snapshot = model
+    if snapshot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Recommendation model is not loaded."
+        )
+    
+    fields = parse_fields(chat_message.fields, allowed=MOVIE_FIELDS + ("explanation",))
+    
+    return StreamingResponse(
+        chat_events(snapshot, chat_message, fields, chat_message.overview_chars),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.get("/movies/search")
 async def search_movies(
     query: str = Query(..., description="Search query for movie titles"),
-    limit: int = Query(10, ge=1, le=50, description="Maximum number of results to return")
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of results to return"),
+    fields: Optional[str] = Query(None, description="Comma-separated movie fields to return: title, overview, poster"),
+    overview_chars: Optional[int] = Query(None, ge=1, description="Cut overviews to at most this many characters")
 ):
     """
     Search for movies by title.
@@ -289,45 +953,137 @@ async def search_movies(
     Args:
         query: Search query (case-insensitive, partial match)
         limit: Maximum number of results to return
+        fields: Movie fields to return (default: title and overview)
+        overview_chars: Maximum overview length, cut at a word boundary
     
     Returns:
-        List of matching movies
+        List of matching movies, ranked exact > prefix > substring match
     """
-    if model is None:
+    snapshot = model
+    if snapshot is None:
         raise HTTPException(
             status_code=503,
             detail="Recommendation model is not loaded. Please ensure movies.csv exists."
         )
+    fields = parse_fields(fields, allowed=("title", "overview", "poster")) or ("title", "overview")
     
     try:
-        query_lower = query.lower().strip()
-        matches = model.df[
-            model.df['title'].str.lower().str.contains(query_lower, na=False)
-        ].head(limit)
-        
-        results = []
-        for idx, row in matches.iterrows():
-            results.append({
-                "title": row['title'],
-                "overview": row['overview']
-            })
+        results = shape_movies(await search_titles(snapshot, query, limit), fields, overview_chars)
         
-        return {
+        return FastJSONResponse({
             "query": query,
             "count": len(results),
             "movies": results
-        }
+        })
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.post("/movies")
+async def add_movies(movies: List[NewMovie], x_admin_token: Optional[str] = Header(None)):
+    """
+    Add movies to the running model without a restart.
+    
+    Requires the server to run with MOVIE_VECTORIZER=hashing and the admin
+    token in the X-Admin-Token header. Movies are appended incrementally;
+    they are not written to movies.csv.
+    
+    Args:
+        movies: List of movies with title, overview and optional poster URL
+    
+    Returns:
+        Number of movies added and the new catalog size; 403 without a
+        valid admin token
+    """
+    check_admin_token(x_admin_token)
+    
+    snapshot = model
+    if snapshot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Recommendation model is not loaded. Please ensure movies.csv exists."
+        )
+    
+    try:
+        added = await run_model_call(snapshot.add_movies, [movie.model_dump(exclude_none=True) for movie in movies])
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    return {
+        "added": added,
+        "total": len(snapshot.catalog)
+    }
+
+
+@app.get("/stats")
+async def stats():
+    """
+    Report model statistics.
+    
+    Returns:
+        Estimated memory held by each model component, in bytes, and the
+        result and query-vector cache counters, and the executor queue and
+        request batching stats
+    """
+    snapshot = model
+    if snapshot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Recommendation model is not loaded. Please ensure movies.csv exists."
+        )
+    
+    memory = await run_model_call(snapshot.memory_report)
+    return {
+        "movies": len(snapshot.catalog),
+        "compact": snapshot.compact,
+        "memory_bytes": memory,
+        "total_memory_bytes": sum(memory.values()),
+        "cache": snapshot.result_cache.stats() if snapshot.result_cache is not None else None,
+        "query_cache": snapshot.query_cache.stats() if snapshot.query_cache is not None else None,
+        "executor": executor.stats(),
+        "batching": coalescer.stats(),
+        "single_flight": flights.stats()
+    }
+
+
+@app.post("/admin/reload", status_code=202)
+async def reload_model(x_admin_token: Optional[str] = Header(None)):
+    """
+    Rebuild the model from movies.csv in the background and swap it in.
+    
+    The current model keeps serving until the new one is ready. Movies
+    added with POST /movies are not in movies.csv and do not survive it.
+    
+    Returns:
+        Reload status; 403 without a valid admin token, 409 if a reload
+        is already running
+    """
+    check_admin_token(x_admin_token)
+    
+    if not start_reload():
+        raise HTTPException(status_code=409, detail="A model reload is already in progress.")
+    
+    return {"status": "reloading"}
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
+    snapshot = model
     return {
-        "status": "healthy" if model is not None else "unhealthy",
-        "model_loaded": model is not None
+        "status": "healthy" if snapshot is not None else "unhealthy",
+        "model_loaded": snapshot is not None,
+        "model_version": snapshot.version if snapshot is not None else None,
+        "movies": len(snapshot.catalog) if snapshot is not None else 0,
+        "build_timings": snapshot.build_timings if snapshot is not None else {},
+        "reload": dict(reload_status)
     }
 
 
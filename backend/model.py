@@ -1,24 +1,179 @@
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import re
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer, TfidfTransformer, HashingVectorizer
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+from sklearn.utils.extmath import safe_sparse_dot
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import time
+import itertools
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows: artifact builds are not coordinated across processes
+    fcntl = None
+from topk import top_k
+from ann_index import IVFIndex
+from incremental import RunningIDF, GrowableCSR, ReadWriteLock
+from title_index import TitleIndex, TitleSpotter, normalize_title
+from catalog import Catalog
+from preprocessing import NON_ALPHANUMERIC, WHITESPACE, preprocess_texts, resolve_n_jobs
+from parallel_build import sharded_counts, sharded_hash_counts
+from compact import CompactTfidfVectorizer, compact_csr, csr_nbytes, python_nbytes
+from cache import TinyLFUCache, LRUCache
+
+
+# Supported similarity search backends
+INDEX_MODES = ('exact', 'ivf')
+
+# TF-IDF settings shared by the model build and artifact loading
+VECTORIZER_PARAMS = {
+    'max_features': 5000,
+    'stop_words': 'english',
+    'ngram_range': (1, 2)  # Use unigrams and bigrams
+}
+
+# Term counting for the incremental (hashing) mode; IDF weighting and
+# normalization are applied by the model from running statistics
+HASHING_PARAMS = {
+    'stop_words': 'english',
+    'ngram_range': (1, 2),
+    'alternate_sign': False,
+    'norm': None
+}
+
+# Supported vectorizers: a fitted TF-IDF vocabulary, or feature hashing
+# with running IDF statistics that supports incremental updates
+VECTORIZER_MODES = ('tfidf', 'hashing')
+
+# Smallest catalog for which build_model shards vectorization over processes
+PARALLEL_MIN_ROWS = 10000
+
+# Bump whenever the on-disk artifact layout changes
+ARTIFACT_VERSION = 9
+
+# Upper bound on the dense similarity block materialized while building the
+# neighbor table, so the build stays bounded for large catalogs
+NEIGHBOR_BLOCK_BYTES = 64 * 1024 * 1024
+
+# Model versions are unique across model instances, so cache keys from a
+# replaced model can never match the current one
+MODEL_VERSIONS = itertools.count(1)
+
+
+@contextmanager
+def artifact_lock(artifact_dir):
+    """
+    Hold an exclusive lock on an artifact directory across processes.
+    
+    Uses flock on a sibling '<artifact_dir>.lock' file, so that when several
+    server workers start together only one of them builds the artifact.
+    
+    Args:
+        artifact_dir: Directory of the persisted artifact
+    """
+    if fcntl is None:
+        yield
+        return
+    
+    lock_path = os.path.abspath(artifact_dir) + '.lock'
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 
 class MovieRecommendationModel:
     """Movie recommendation model using TF-IDF and cosine similarity."""
     
-    def __init__(self, csv_path='movies.csv'):
+    def __init__(self, csv_path='movies.csv', neighbors_k=0, neighbor_chunk_size=None,
+                 index='exact', ann_lists=None, ann_probes=8, embedding_dim=0,
+                 vectorizer_mode='tfidf', hash_features=2 ** 20, reweight_threshold=0.1,
+                 n_jobs=1, compact=False, cache_size=0, query_cache_size=0):
         """
         Initialize the recommendation model.
         
         Args:
             csv_path: Path to the movies CSV file
+            neighbors_k: Number of nearest neighbors to precompute per movie
+                (0 disables the neighbor table)
+            neighbor_chunk_size: Rows scored per block while building the
+                neighbor table (default: sized to NEIGHBOR_BLOCK_BYTES)
+            index: Similarity search backend, 'exact' (brute-force scan) or
+                'ivf' (approximate inverted-file index)
+            ann_lists: Number of IVF clusters (default: sqrt of the catalog size)
+            ann_probes: Number of IVF clusters scanned per query; higher
+                values improve recall at the cost of latency
+            embedding_dim: Project the TF-IDF matrix to this many dense float32
+                dimensions with TruncatedSVD and score in that space
+                (0 keeps the sparse TF-IDF representation)
+            vectorizer_mode: 'tfidf' fits a vocabulary, 'hashing' uses feature
+                hashing with running IDF statistics so that add_movies() can
+                append movies without a refit
+            hash_features: Size of the hashed feature space ('hashing' mode)
+            reweight_threshold: Fraction of catalog growth after which
+                add_movies() re-weights every movie with the current IDF
+                ('hashing' mode)
+            n_jobs: Worker processes for preprocessing and vectorizing large
+                catalogs (-1 uses all cores); the result is identical to a
+                single-process build
+            compact: Store matrices as float32 with int32 indices, replace the
+                fitted vectorizer with an array-backed vocabulary and drop the
+                DataFrame once the catalog is built, to reduce memory per worker
+            cache_size: Maximum number of recommendation results kept in the
+                in-process cache (0 disables it)
+            query_cache_size: Maximum number of free-text query vectors kept
+                in an LRU cache by recommend_text() (0 disables it)
         """
+        if index not in INDEX_MODES:
+            raise ValueError(f"Unknown index mode '{index}'. Expected one of {INDEX_MODES}")
+        if vectorizer_mode not in VECTORIZER_MODES:
+            raise ValueError(f"Unknown vectorizer mode '{vectorizer_mode}'. Expected one of {VECTORIZER_MODES}")
+        
         self.csv_path = csv_path
+        self.neighbors_k = neighbors_k
+        self.neighbor_chunk_size = neighbor_chunk_size
+        self.index = index
+        self.ann_lists = ann_lists
+        self.ann_probes = ann_probes
+        self.embedding_dim = embedding_dim
+        self.vectorizer_mode = vectorizer_mode
+        self.hash_features = hash_features
+        self.reweight_threshold = reweight_threshold
+        self.n_jobs = n_jobs
+        self.compact = compact
+        self.result_cache = TinyLFUCache(cache_size) if cache_size else None
+        self.query_cache = LRUCache(query_cache_size) if query_cache_size else None
+        self.version = 0
+        self.state_lock = ReadWriteLock()
+        self.ann_index = None
         self.df = None
+        self.cleaned_overviews = None
+        self.catalog = None
+        self.title_index = None
+        self.title_spotter = None
         self.tfidf_matrix = None
         self.vectorizer = None
+        self._vectorizer_size = None
+        self.idf_stats = None
+        self.term_counts = None
+        self.docs_at_reweight = 0
+        self._count_buffer = None
+        self._tfidf_buffer = None
+        self.svd_components = None
+        self.embeddings = None
+        self.neighbor_indices = None
+        self.neighbor_scores = None
+        self.artifact_meta = None
+        self.build_timings = {}
         self.is_loaded = False
     
     def clean_text(self, text):
@@ -36,15 +191,16 @@ class MovieRecommendationModel:
         # Convert to lowercase
         text = str(text).lower()
         # Remove special characters and keep only alphanumeric and spaces
-        text = re.sub(r'[^a-z0-9\s]', '', text)
+        text = NON_ALPHANUMERIC.sub('', text)
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = WHITESPACE.sub(' ', text).strip()
         return text
     
     def load_data(self):
         """Load and preprocess the movie dataset."""
         try:
             # Load CSV file
+            start = time.perf_counter()
             self.df = pd.read_csv(self.csv_path)
             
             # Validate required columns
@@ -56,13 +212,28 @@ class MovieRecommendationModel:
             # Drop rows with missing titles or overviews
             self.df = self.df.dropna(subset=['title', 'overview'])
             
-            # Clean the overview text
-            self.df['cleaned_overview'] = self.df['overview'].apply(self.clean_text)
-            
             # Reset index for easier indexing
             self.df = self.df.reset_index(drop=True)
             
+            self.build_timings = {'load_csv': time.perf_counter() - start}
+            
+            # Clean the overview text in batch; kept only until build_model consumes it
+            start = time.perf_counter()
+            self.cleaned_overviews = preprocess_texts(self.df['overview'], n_jobs=self.n_jobs)
+            self.build_timings['preprocess'] = time.perf_counter() - start
+            
+            # Columnar copy of the response fields, and the normalized title
+            # lookups used by find_movie_index and spot_title
+            start = time.perf_counter()
+            self.catalog = Catalog.from_frame(self.df)
+            self.title_index = TitleIndex.from_titles(self.catalog.titles)
+            self.title_spotter = TitleSpotter.from_keys(self.title_index.keys)
+            self.build_timings['catalog'] = time.perf_counter() - start
+            
             print(f"Loaded {len(self.df)} movies successfully.")
+            if self.compact:
+                # Responses are served from the catalog; the frame is not needed
+                self.df = None
             self.is_loaded = True
             
         except FileNotFoundError:
@@ -75,21 +246,417 @@ class MovieRecommendationModel:
         if not self.is_loaded:
             self.load_data()
         
-        # Initialize TF-IDF Vectorizer
-        self.vectorizer = TfidfVectorizer(
-            max_features=5000,
-            stop_words='english',
-            ngram_range=(1, 2)  # Use unigrams and bigrams
-        )
+        cleaned_overviews = self.cleaned_overviews
+        if cleaned_overviews is None:
+            start = time.perf_counter()
+            cleaned_overviews = preprocess_texts(self.catalog.overviews, n_jobs=self.n_jobs)
+            self.build_timings['preprocess'] = time.perf_counter() - start
+        
+        n_jobs = resolve_n_jobs(self.n_jobs)
+        parallel = n_jobs > 1 and len(cleaned_overviews) >= PARALLEL_MIN_ROWS
+        timings = {}
+        start = time.perf_counter()
         
-        # Fit and transform the cleaned overviews
-        self.tfidf_matrix = self.vectorizer.fit_transform(self.df['cleaned_overview'])
+        if self.vectorizer_mode == 'hashing':
+            # Count hashed terms and derive IDF from running statistics
+            self.vectorizer = HashingVectorizer(n_features=self.hash_features, **HASHING_PARAMS)
+            if parallel:
+                hashing_params = dict(HASHING_PARAMS, n_features=self.hash_features)
+                counts = sharded_hash_counts(cleaned_overviews, hashing_params, n_jobs, timings)
+            else:
+                counts = self.vectorizer.transform(cleaned_overviews)
+            self.idf_stats = RunningIDF(self.hash_features, dtype=self.float_dtype)
+            self.idf_stats.update(counts)
+            self.term_counts = compact_csr(counts) if self.compact else counts
+            self.reweight(rebuild_indexes=False)
+        elif parallel:
+            # Tokenize and count shards in worker processes, merge their
+            # vocabularies, then weight exactly as TfidfVectorizer does
+            vocabulary, counts = sharded_counts(cleaned_overviews, VECTORIZER_PARAMS, n_jobs, timings)
+            weighting_start = time.perf_counter()
+            transformer = TfidfTransformer()
+            self.tfidf_matrix = transformer.fit_transform(counts)
+            self.vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS, vocabulary=vocabulary)
+            self.vectorizer.idf_ = transformer.idf_
+            timings['weighting'] = time.perf_counter() - weighting_start
+        else:
+            # Initialize TF-IDF Vectorizer
+            self.vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS)
+            
+            # Fit and transform the cleaned overviews
+            self.tfidf_matrix = self.vectorizer.fit_transform(cleaned_overviews)
+        
+        if self.compact and self.vectorizer_mode == 'tfidf':
+            self.tfidf_matrix = compact_csr(self.tfidf_matrix)
+            self.vectorizer = CompactTfidfVectorizer(
+                self.vectorizer.get_feature_names_out(),
+                self.vectorizer.idf_,
+                VECTORIZER_PARAMS
+            )
+        
+        # The vectorizer has consumed the cleaned text; don't keep a copy around
+        self.cleaned_overviews = None
+        del cleaned_overviews
         
+        self.build_timings.update(timings)
+        self.build_timings['vectorize'] = time.perf_counter() - start
         print("TF-IDF model built successfully.")
+        
+        start = time.perf_counter()
+        self.build_indexes()
+        self.build_timings['indexes'] = time.perf_counter() - start
+        
+        print("Build timings: " + ", ".join(
+            f"{phase}={seconds:.3f}s" for phase, seconds in self.build_timings.items()
+        ))
+    
+    def weight_counts(self, counts):
+        """
+        Turn hashed term counts into L2-normalized TF-IDF rows.
+        
+        Args:
+            counts: Sparse term-count matrix from the hashing vectorizer
+            
+        Returns:
+            Sparse CSR TF-IDF matrix (float32 in compact mode)
+        """
+        tfidf_rows = normalize(sp.csr_matrix(counts.multiply(self.idf_stats.idf)))
+        return compact_csr(tfidf_rows) if self.compact else tfidf_rows
+    
+    def reweight(self, rebuild_indexes=True):
+        """
+        Re-weight every movie with the current IDF statistics.
+        
+        Rows appended by add_movies() keep the IDF that was current when
+        they were added; this periodic pass removes that drift. It works
+        from the stored term counts, so no text is re-tokenized. Titles
+        added since the last pass are folded into the main title spotter.
+        
+        Args:
+            rebuild_indexes: Also rebuild the derived indexes
+        """
+        if self.vectorizer_mode != 'hashing':
+            raise ValueError("Re-weighting requires vectorizer_mode='hashing'.")
+        
+        self.tfidf_matrix = self.weight_counts(self.term_counts)
+        self.docs_at_reweight = self.idf_stats.n_docs
+        self._count_buffer = None
+        self._tfidf_buffer = None
+        if self.title_spotter is not None and self.title_spotter.added:
+            # Fold the titles added since the last pass into one automaton
+            self.title_spotter = TitleSpotter.from_keys(self.title_index.keys)
+        
+        if rebuild_indexes:
+            self.build_indexes()
+        else:
+            self.model_changed()
+    
+    def add_movies(self, movies):
+        """
+        Append new movies to the live model without refitting it.
+        
+        Requires vectorizer_mode='hashing'. The cost is proportional to the
+        number of new movies; once the catalog has grown by more than
+        reweight_threshold since the last full weighting, every movie is
+        re-weighted with the updated IDF.
+        
+        The update holds the write side of state_lock, so requests running
+        on other threads see the catalog either before or after it.
+        
+        Args:
+            movies: Iterable of dicts with 'title' and 'overview' (and
+                optionally 'poster')
+            
+        Returns:
+            Number of movies added
+        """
+        with self.state_lock.write():
+            return self._append_movies(movies)
+    
+    def _append_movies(self, movies):
+        """Perform add_movies() while holding the write lock."""
+        if self.vectorizer_mode != 'hashing':
+            raise ValueError("Incremental updates require vectorizer_mode='hashing'.")
+        if self.tfidf_matrix is None:
+            self.build_model()
+        
+        new_df = pd.DataFrame(list(movies))
+        missing_columns = [col for col in ['title', 'overview'] if col not in new_df.columns]
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {missing_columns}")
+        new_df = new_df.dropna(subset=['title', 'overview'])
+        # Blank titles and overviews are dropped like missing ones
+        blank = (new_df['title'].astype(str).str.strip() == '') | (new_df['overview'].astype(str).str.strip() == '')
+        new_df = new_df[~blank].reset_index(drop=True)
+        if new_df.empty:
+            return 0
+        
+        cleaned = preprocess_texts(new_df['overview'], n_jobs=self.n_jobs)
+        counts = self.vectorizer.transform(cleaned)
+        self.idf_stats.update(counts)
+        
+        # Append to growable copies of the matrices (made on first use, since
+        # the loaded arrays may be read-only memory maps)
+        if self._count_buffer is None:
+            self._count_buffer = GrowableCSR(self.term_counts)
+            self._tfidf_buffer = GrowableCSR(self.tfidf_matrix)
+        self._count_buffer.append(counts)
+        self.term_counts = self._count_buffer.matrix
+        
+        first_id = len(self.catalog)
+        if self.df is not None:
+            self.df = pd.concat([self.df, new_df], ignore_index=True)
+        self.catalog = self.catalog.extend(new_df)
+        self.title_index.extend(new_df['title'])
+        self.title_spotter.extend([self.title_index.keys[idx] for idx in range(first_id, len(self.catalog))], first_id)
+        
+        if self.idf_stats.n_docs > self.docs_at_reweight * (1 + self.reweight_threshold):
+            self.reweight()
+            print(f"Added {len(new_df)} movies and re-weighted the catalog.")
+            return len(new_df)
+        
+        new_rows = self.weight_counts(counts)
+        self._tfidf_buffer.append(new_rows)
+        self.tfidf_matrix = self._tfidf_buffer.matrix
+        
+        new_vectors = new_rows
+        if self.embeddings is not None:
+            new_vectors = self.embed(new_rows)
+            self.embeddings = np.vstack([self.embeddings, new_vectors])
+        if self.ann_index is not None:
+            self.ann_index.add(new_vectors, first_id)
+        if self.neighbor_indices is not None:
+            self.extend_neighbor_table(new_vectors, first_id)
+        self.model_changed()
+        
+        print(f"Added {len(new_df)} movies incrementally.")
+        return len(new_df)
+    
+    def extend_neighbor_table(self, new_vectors, first_id):
+        """
+        Add table rows for new movies and merge them into existing rows.
+        
+        Args:
+            new_vectors: Item vectors of the new movies
+            first_id: Movie index of the first new movie
+        """
+        n_movies = self.item_vectors.shape[0]
+        k = self.neighbor_indices.shape[1]
+        chunk_size = self.neighbor_chunk_size or max(1, NEIGHBOR_BLOCK_BYTES // (n_movies * 8))
+        
+        neighbor_indices = np.array(self.neighbor_indices)
+        neighbor_scores = np.array(self.neighbor_scores)
+        new_indices = []
+        new_scores = []
+        
+        for start in range(0, new_vectors.shape[0], chunk_size):
+            stop = min(start + chunk_size, new_vectors.shape[0])
+            ids = np.arange(first_id + start, first_id + stop)
+            block = self.score(new_vectors[start:stop])
+            
+            # Existing movies: similarity is symmetric, so the block columns
+            # are their scores against the new movies
+            candidate_indices = np.hstack([neighbor_indices, np.broadcast_to(ids, (first_id, len(ids)))])
+            candidate_scores = np.hstack([neighbor_scores, block[:, :first_id].T.astype(np.float32)])
+            top, top_scores = top_k(candidate_scores, k)
+            neighbor_indices = np.take_along_axis(candidate_indices, top, axis=1)
+            neighbor_scores = top_scores
+            
+            block[np.arange(len(ids)), ids] = -np.inf
+            top, top_scores = top_k(block, k)
+            new_indices.append(top)
+            new_scores.append(top_scores)
+        
+        self.neighbor_indices = np.vstack([neighbor_indices] + new_indices).astype(np.int32)
+        self.neighbor_scores = np.vstack([neighbor_scores] + new_scores).astype(np.float32)
+    
+    def build_indexes(self):
+        """Build the optional structures derived from the TF-IDF matrix."""
+        self.svd_components = None
+        self.embeddings = None
+        self.ann_index = None
+        self.neighbor_indices = None
+        self.neighbor_scores = None
+        
+        if self.embedding_dim:
+            self.build_embeddings()
+        
+        if self.index == 'ivf':
+            self.ann_index = IVFIndex(n_lists=self.ann_lists, n_probe=self.ann_probes)
+            self.ann_index.build(self.item_vectors)
+        
+        if self.neighbors_k:
+            self.build_neighbor_table()
+        
+        self.model_changed()
+    
+    def model_changed(self):
+        """
+        Start a new model version after the catalog or its vectors changed.
+        
+        Cached results and query vectors belong to the previous version, so
+        the caches are emptied; their keys also carry the version, so a value
+        computed concurrently from the old version can never be served.
+        """
+        self.version = next(MODEL_VERSIONS)
+        for cache in (self.result_cache, self.query_cache):
+            if cache is not None:
+                cache.clear()
+    
+    def build_embeddings(self):
+        """
+        Project the TF-IDF matrix to a dense low-rank embedding with TruncatedSVD.
+        
+        The fitted projection is kept in svd_components so that new queries
+        and new movies can be embedded with embed().
+        """
+        n_components = min(self.embedding_dim, min(self.tfidf_matrix.shape) - 1)
+        if n_components < 1:
+            self.svd_components = None
+            self.embeddings = None
+            return
+        
+        svd = TruncatedSVD(n_components=n_components, random_state=42)
+        svd.fit(self.tfidf_matrix)
+        self.svd_components = svd.components_.astype(np.float32)
+        self.embeddings = self.embed(self.tfidf_matrix)
+        
+        sparse_bytes = self.tfidf_matrix.data.nbytes + self.tfidf_matrix.indices.nbytes + self.tfidf_matrix.indptr.nbytes
+        print(f"Dense embeddings built: {self.embeddings.shape[0]} x {n_components} "
+              f"({self.embeddings.nbytes / 1e6:.1f} MB dense vs {sparse_bytes / 1e6:.1f} MB sparse).")
+    
+    def embed(self, tfidf_rows):
+        """
+        Project TF-IDF rows into the dense embedding space.
+        
+        Args:
+            tfidf_rows: Sparse TF-IDF matrix with one row per document
+            
+        Returns:
+            L2-normalized float32 array of shape (n_rows, embedding dimensions)
+        """
+        projected = safe_sparse_dot(tfidf_rows, self.svd_components.T, dense_output=True)
+        return normalize(projected).astype(np.float32)
+    
+    @property
+    def float_dtype(self):
+        """Float type of the stored TF-IDF values."""
+        return np.float32 if self.compact else np.float64
+    
+    @property
+    def item_vectors(self):
+        """Vectors used for scoring: dense embeddings if built, otherwise TF-IDF rows."""
+        return self.embeddings if self.embeddings is not None else self.tfidf_matrix
+    
+    def transform_texts(self, texts):
+        """
+        Vectorize raw texts into the space used for scoring.
+        
+        Args:
+            texts: Iterable of raw text strings
+            
+        Returns:
+            Sparse TF-IDF rows, or dense embeddings when the dense mode is active
+        """
+        tfidf_rows = self.vectorizer.transform([self.clean_text(text) for text in texts])
+        if self.vectorizer_mode == 'hashing':
+            tfidf_rows = self.weight_counts(tfidf_rows)
+        if self.embeddings is not None:
+            return self.embed(tfidf_rows)
+        return tfidf_rows
+    
+    def score(self, query):
+        """
+        Compute cosine similarities between query vectors and every movie.
+        
+        Item vectors are L2-normalized, so this is a single sparse or dense
+        (BLAS) matrix product.
+        
+        Args:
+            query: Query vectors of shape (n_queries, n_features), in the
+                same space as item_vectors
+            
+        Returns:
+            Dense array of shape (n_queries, n_movies)
+        """
+        return safe_sparse_dot(query, self.item_vectors.T, dense_output=True)
+    
+    def build_neighbor_table(self):
+        """
+        Precompute the top-K most similar movies for every movie.
+        
+        Similarities are computed in row blocks so that only
+        chunk_size x n_movies scores are held in memory at once.
+        """
+        vectors = self.item_vectors
+        n_movies = vectors.shape[0]
+        k = min(self.neighbors_k, n_movies - 1)
+        if k <= 0:
+            self.neighbor_indices = None
+            self.neighbor_scores = None
+            return
+        
+        chunk_size = self.neighbor_chunk_size or max(1, NEIGHBOR_BLOCK_BYTES // (n_movies * 8))
+        
+        neighbor_indices = np.empty((n_movies, k), dtype=np.int32)
+        neighbor_scores = np.empty((n_movies, k), dtype=np.float32)
+        
+        for start in range(0, n_movies, chunk_size):
+            stop = min(start + chunk_size, n_movies)
+            rows = np.arange(stop - start)
+            
+            block = self.score(vectors[start:stop])
+            block[rows, rows + start] = -np.inf
+            
+            neighbor_indices[start:stop], neighbor_scores[start:stop] = top_k(block, k)
+        
+        self.neighbor_indices = neighbor_indices
+        self.neighbor_scores = neighbor_scores
+        
+        print(f"Neighbor table built for {n_movies} movies (k={k}).")
+    
+    def resolve_title(self, movie_title):
+        """
+        Resolve a user-supplied title to a movie.
+        
+        Tries, in order: exact match, prefix match, substring match and
+        typo-tolerant fuzzy match. Exact and prefix matches are hash and
+        binary-search lookups; the others go through the trigram index.
+        
+        Args:
+            movie_title: Title of the movie to find
+            
+        Returns:
+            Tuple of (movie index, match type, confidence), where match type
+            is 'exact', 'prefix', 'substring' or 'fuzzy' and confidence is
+            between 0 and 1, or None if not found
+        """
+        index = self.title_index
+        query_length = max(len(normalize_title(movie_title)), 1)
+        
+        # Try exact match first
+        movie_idx = index.lookup_exact(movie_title)
+        if movie_idx is not None:
+            return movie_idx, 'exact', 1.0
+        
+        # Try prefix match, then any partial match; confidence is the share
+        # of the matched title covered by the query
+        for match_type, lookup in (('prefix', index.lookup_prefix), ('substring', index.lookup_substring)):
+            movie_idx = lookup(movie_title)
+            if movie_idx is not None:
+                return movie_idx, match_type, min(1.0, query_length / max(len(index.keys[movie_idx]), 1))
+        
+        # Finally, tolerate typos
+        fuzzy_match = index.lookup_fuzzy(movie_title)
+        if fuzzy_match is not None:
+            movie_idx, confidence = fuzzy_match
+            return movie_idx, 'fuzzy', confidence
+        
+        return None
     
     def find_movie_index(self, movie_title):
         """
-        Find the index of a movie by title (case-insensitive, partial match).
+        Find the index of a movie by title (case-insensitive, partial or fuzzy match).
         
         Args:
             movie_title: Title of the movie to find
@@ -97,72 +664,722 @@ class MovieRecommendationModel:
         Returns:
             Index of the movie in the dataframe, or None if not found
         """
-        movie_title_lower = str(movie_title).lower().strip()
+        match = self.resolve_title(movie_title)
+        return match[0] if match is not None else None
+    
+    def match_title(self, movie_title):
+        """
+        Resolve a title on its own, for callers that resolve and score in
+        separate steps; safe against concurrent add_movies() calls.
         
-        # Try exact match first
-        exact_match = self.df[self.df['title'].str.lower() == movie_title_lower]
-        if not exact_match.empty:
-            return exact_match.index[0]
+        Args:
+            movie_title: Title of the movie to find
+            
+        Returns:
+            Same as resolve_title()
+        """
+        with self.state_lock.read():
+            return self.resolve_title(movie_title)
+    
+    def spot_title(self, text):
+        """
+        Find the movie a chat message mentions by its exact title.
+        
+        Scans the message once with the title automaton, so the cost does
+        not depend on the catalog size.
+        
+        Args:
+            text: Free text such as "I loved The Matrix Reloaded!"
+            
+        Returns:
+            Index of the movie with the longest title found in the text,
+            or None if it mentions no title
+        """
+        with self.state_lock.read():
+            return self.title_spotter.find(normalize_title(text))
+    
+    def search_titles(self, query, limit=10):
+        """
+        Search movies by title.
+        
+        Args:
+            query: Search query (case-insensitive, partial match)
+            limit: Maximum number of results
+            
+        Returns:
+            List of movie indices ranked exact > prefix > substring match
+        """
+        with self.state_lock.read():
+            return self.title_index.search(query, limit)
+    
+    def movie_info(self, idx):
+        """
+        Get the catalog fields of a movie.
+        
+        Args:
+            idx: Movie index
+            
+        Returns:
+            Dictionary with title, overview and, when available, poster URL
+        """
+        return self.catalog.record(idx)
+    
+    def memory_report(self):
+        """
+        Estimate the memory held by each component of the model.
+        
+        Array sizes are exact; Python containers (the dict vocabulary) are
+        approximated with sys.getsizeof, once per fitted vectorizer since
+        walking them is slow for large vocabularies. Memory-mapped arrays
+        are counted at full size, although their pages are shared by every
+        process that maps the same artifact.
+        
+        Returns:
+            Dictionary of component name to size in bytes
+        """
+        if isinstance(self.vectorizer, CompactTfidfVectorizer):
+            vectorizer_bytes = self.vectorizer.nbytes
+        elif isinstance(self.vectorizer, TfidfVectorizer):
+            if self._vectorizer_size is None or self._vectorizer_size[0] is not self.vectorizer:
+                self._vectorizer_size = (self.vectorizer, python_nbytes([
+                    getattr(self.vectorizer, 'vocabulary_', self.vectorizer.vocabulary),
+                    getattr(self.vectorizer, 'stop_words_', None),
+                    getattr(self.vectorizer, 'idf_', None)
+                ]))
+            vectorizer_bytes = self._vectorizer_size[1]
+        else:
+            vectorizer_bytes = 0
+        if self.idf_stats is not None:
+            vectorizer_bytes += self.idf_stats.doc_freq.nbytes + self.idf_stats.idf.nbytes
+        
+        buffer_bytes = 0
+        for buffer in (self._count_buffer, self._tfidf_buffer):
+            if buffer is not None:
+                buffer_bytes += buffer.data.nbytes + buffer.indices.nbytes + buffer.indptr.nbytes
+        
+        title_index_bytes = sum(
+            structure.nbytes for structure in (self.title_index, self.title_spotter) if structure is not None
+        )
+        
+        report = {
+            'tfidf_matrix': csr_nbytes(self.tfidf_matrix),
+            'term_counts': csr_nbytes(self.term_counts),
+            'append_buffers': buffer_bytes,
+            'vectorizer': vectorizer_bytes,
+            'embeddings': sum(array.nbytes for array in (self.embeddings, self.svd_components) if array is not None),
+            'ann_index': 0,
+            'neighbor_table': sum(array.nbytes for array in (self.neighbor_indices, self.neighbor_scores) if array is not None),
+            'catalog': sum(array.nbytes for array in self.catalog.arrays().values()) if self.catalog is not None else 0,
+            'title_index': title_index_bytes,
+            'dataframe': int(self.df.memory_usage(deep=True).sum()) if self.df is not None else 0
+        }
+        if self.ann_index is not None:
+            index = self.ann_index
+            report['ann_index'] = index.centroids.nbytes + index.list_items.nbytes + index.list_offsets.nbytes
+        return report
+    
+    def index_options(self):
+        """Options that determine the structures built by build_indexes()."""
+        return {
+            'vectorizer_mode': self.vectorizer_mode,
+            'neighbors_k': self.neighbors_k,
+            'embedding_dim': self.embedding_dim,
+            'index': self.index,
+            'ann_lists': self.ann_lists
+        }
+    
+    @staticmethod
+    def file_hash(path):
+        """
+        Compute the SHA-256 content hash of a file.
+        
+        Args:
+            path: Path to the file
+            
+        Returns:
+            Hex digest string
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def save(self, artifact_dir, source_hash=None):
+        """
+        Save the fitted model to a versioned artifact directory.
+        
+        The TF-IDF matrix is stored as raw CSR arrays (.npy) so that load()
+        can memory-map them. The directory is written next to its final
+        location and moved into place once complete.
+        
+        Args:
+            artifact_dir: Directory to write the artifact to
+            source_hash: Content hash of the source CSV (computed if omitted)
+        """
+        if self.tfidf_matrix is None:
+            raise ValueError("Model must be built before it can be saved.")
+        
+        artifact_dir = os.path.abspath(artifact_dir)
+        parent_dir = os.path.dirname(artifact_dir)
+        os.makedirs(parent_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix='.artifact-', dir=parent_dir)
+        
+        try:
+            arrays = {
+                'tfidf_data': self.tfidf_matrix.data,
+                'tfidf_indices': self.tfidf_matrix.indices,
+                'tfidf_indptr': self.tfidf_matrix.indptr
+            }
+            if self.vectorizer_mode == 'hashing':
+                arrays['doc_freq'] = self.idf_stats.doc_freq
+                arrays['count_data'] = self.term_counts.data
+                arrays['count_indices'] = self.term_counts.indices
+                arrays['count_indptr'] = self.term_counts.indptr
+            else:
+                arrays['idf'] = self.vectorizer.idf_
+            if self.svd_components is not None:
+                arrays['svd_components'] = self.svd_components
+                arrays['embeddings'] = self.embeddings
+            if self.ann_index is not None:
+                arrays['ivf_centroids'] = self.ann_index.centroids
+                arrays['ivf_list_items'] = self.ann_index.list_items
+                arrays['ivf_list_offsets'] = self.ann_index.list_offsets
+            arrays.update(self.catalog.arrays())
+            arrays.update(self.title_index.arrays())
+            spotter = self.title_spotter
+            if spotter.added:
+                # One automaton over every title, including added movies
+                spotter = TitleSpotter.from_keys(self.title_index.keys)
+            arrays.update(spotter.arrays())
+            if self.neighbor_indices is not None:
+                arrays['neighbor_indices'] = self.neighbor_indices
+                arrays['neighbor_scores'] = self.neighbor_scores
+            
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(array))
+            
+            if self.vectorizer_mode == 'tfidf':
+                with open(os.path.join(tmp_dir, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+                    json.dump(self.vectorizer.get_feature_names_out().tolist(), f)
+            
+            meta = {
+                'version': ARTIFACT_VERSION,
+                'source_hash': source_hash or self.file_hash(self.csv_path),
+                'shape': list(self.tfidf_matrix.shape),
+                'vectorizer_mode': self.vectorizer_mode,
+                'compact': self.compact,
+                'hash_features': self.hash_features,
+                'n_docs': self.idf_stats.n_docs if self.idf_stats is not None else None,
+                'docs_at_reweight': self.docs_at_reweight,
+                'index_options': self.index_options(),
+                'arrays': sorted(arrays)
+            }
+            # Written last: a directory without meta.json is never loaded
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+            
+            if os.path.exists(artifact_dir):
+                shutil.rmtree(artifact_dir)
+            os.rename(tmp_dir, artifact_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        
+        print(f"Model artifact saved to {artifact_dir}.")
+    
+    def load(self, artifact_dir, source_hash=None, mmap=True):
+        """
+        Load a model artifact written by save().
+        
+        Args:
+            artifact_dir: Directory containing the artifact
+            source_hash: Expected content hash of the source CSV; the
+                artifact is rejected when it was built from different data
+            mmap: Memory-map the large arrays instead of reading them into memory
+            
+        Returns:
+            True if the artifact was loaded, False if it is missing, stale
+            or from an incompatible version
+        """
+        meta_path = os.path.join(artifact_dir, 'meta.json')
+        if not os.path.exists(meta_path):
+            return False
+        
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != ARTIFACT_VERSION:
+            return False
+        if source_hash is not None and meta.get('source_hash') != source_hash:
+            return False
+        if meta.get('vectorizer_mode') != self.vectorizer_mode:
+            return False
+        if meta.get('compact', False) != self.compact:
+            return False
+        
+        start = time.perf_counter()
+        mmap_mode = 'r' if mmap else None
+        
+        def read_array(name):
+            return np.load(os.path.join(artifact_dir, f'{name}.npy'), mmap_mode=mmap_mode)
+        
+        if self.vectorizer_mode == 'hashing':
+            self.hash_features = meta['hash_features']
+            self.vectorizer = HashingVectorizer(n_features=self.hash_features, **HASHING_PARAMS)
+            self.idf_stats = RunningIDF(self.hash_features, read_array('doc_freq'), meta['n_docs'], dtype=self.float_dtype)
+            self.term_counts = sp.csr_matrix(
+                (read_array('count_data'), read_array('count_indices'), read_array('count_indptr')),
+                shape=(meta['shape'][0], self.hash_features)
+            )
+            self.docs_at_reweight = meta['docs_at_reweight']
+            self._count_buffer = None
+            self._tfidf_buffer = None
+        else:
+            with open(os.path.join(artifact_dir, 'vocabulary.json'), encoding='utf-8') as f:
+                terms = json.load(f)
+            if self.compact:
+                self.vectorizer = CompactTfidfVectorizer(terms, read_array('idf'), VECTORIZER_PARAMS)
+            else:
+                self.vectorizer = TfidfVectorizer(
+                    **VECTORIZER_PARAMS,
+                    vocabulary={term: i for i, term in enumerate(terms)}
+                )
+                self.vectorizer.idf_ = read_array('idf')
+            del terms
+        
+        self.tfidf_matrix = sp.csr_matrix(
+            (read_array('tfidf_data'), read_array('tfidf_indices'), read_array('tfidf_indptr')),
+            shape=tuple(meta['shape'])
+        )
+        self.df = None
+        self.catalog = Catalog.from_arrays(read_array)
+        self.title_index = TitleIndex.from_arrays(read_array)
+        self.title_spotter = TitleSpotter.from_arrays(read_array)
+        self.is_loaded = True
+        self.artifact_meta = meta
+        
+        if meta.get('index_options') == self.index_options():
+            arrays = set(meta.get('arrays', []))
+            self.svd_components = self.embeddings = self.ann_index = None
+            self.neighbor_indices = self.neighbor_scores = None
+            if 'svd_components' in arrays:
+                self.svd_components = read_array('svd_components')
+                self.embeddings = read_array('embeddings')
+            if 'ivf_centroids' in arrays:
+                self.ann_index = IVFIndex(n_lists=self.ann_lists, n_probe=self.ann_probes)
+                self.ann_index.centroids = read_array('ivf_centroids')
+                self.ann_index.list_items = read_array('ivf_list_items')
+                self.ann_index.list_offsets = read_array('ivf_list_offsets')
+            if 'neighbor_indices' in arrays:
+                self.neighbor_indices = read_array('neighbor_indices')
+                self.neighbor_scores = read_array('neighbor_scores')
+            self.model_changed()
+        else:
+            # Same TF-IDF model, different index settings: rebuild only the indexes
+            self.build_indexes()
+        self.build_timings = {'load_artifact': time.perf_counter() - start}
+        
+        print(f"Loaded model artifact with {len(self.catalog)} movies from {artifact_dir}.")
+        return True
+    
+    def load_or_build(self, artifact_dir):
+        """
+        Load the model from an artifact, fitting and saving it if needed.
+        
+        The artifact is reused only when it was built from a CSV with the
+        same content hash as the current one. Processes sharing an artifact
+        directory (server workers) take turns: the first one builds and saves
+        it while the others wait, then load it. Every process ends up with the
+        arrays memory-mapped read-only from the same files, so the operating
+        system keeps a single copy of them in memory.
+        
+        Args:
+            artifact_dir: Directory of the persisted artifact
+        """
+        try:
+            source_hash = self.file_hash(self.csv_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Movie dataset not found at {self.csv_path}. Please download it from the sources mentioned in README.md")
+        
+        with artifact_lock(artifact_dir):
+            if self.load(artifact_dir, source_hash=source_hash):
+                if self.artifact_meta['index_options'] == self.index_options():
+                    return
+            else:
+                self.load_data()
+                self.build_model()
+            
+            try:
+                self.save(artifact_dir, source_hash=source_hash)
+            except OSError as e:
+                print(f"Warning: could not save model artifact: {str(e)}")
+                return
+            
+            # Swap the freshly built in-memory arrays for shared memory maps
+            build_timings = self.build_timings
+            self.load(artifact_dir, source_hash=source_hash)
+            self.build_timings = dict(build_timings, **self.build_timings)
+    
+    def exclusion_mask(self, movie_idx=None, exclude=None):
+        """
+        Build a boolean mask of movies that must not be recommended.
+        
+        Args:
+            movie_idx: Index of the seed movie (always excluded)
+            exclude: Optional iterable of movie indices or titles to skip,
+                e.g. titles already shown in the chat session
+            
+        Returns:
+            Boolean array with True for every excluded movie
+        """
+        mask = np.zeros(len(self.catalog), dtype=bool)
+        if movie_idx is not None:
+            mask[movie_idx] = True
+        
+        if exclude:
+            titles = set()
+            for item in exclude:
+                if isinstance(item, (int, np.integer)):
+                    if 0 <= item < len(mask):
+                        mask[item] = True
+                else:
+                    titles.add(str(item))
+            for title in titles:
+                mask[self.title_index.ids_for(title)] = True
+        
+        return mask
+    
+    def exclusion_key(self, exclude):
+        """
+        Canonical, hashable form of an exclusion list for cache keys.
+        
+        Args:
+            exclude: Optional iterable of movie indices or titles
+            
+        Returns:
+            Frozenset of movie indices and normalized titles
+        """
+        return frozenset(
+            int(item) if isinstance(item, (int, np.integer)) else normalize_title(item)
+            for item in (exclude or ())
+        )
+    
+    def recommend_indices(self, movie_idx, limit=5, exclude=None):
+        """
+        Find the movies most similar to the movie at movie_idx.
+        
+        Args:
+            movie_idx: Index of the seed movie
+            limit: Number of recommendations to return
+            exclude: Optional iterable of movie indices or titles to skip
+            
+        Returns:
+            Tuple of (indices, scores) ordered by descending similarity
+        """
+        with self.state_lock.read():
+            return self.recommend_indices_batch([(movie_idx, limit, exclude)])[0]
+    
+    def recommend_indices_batch(self, requests, scan=True):
+        """
+        Find the most similar movies for several seed movies at once.
+        
+        Each request is answered from the result cache or the neighbor table
+        when possible. The remaining seeds are scored together: their vectors
+        are stacked and multiplied with the item matrix in one sparse or
+        dense product per block, then each row gets its own exclusions and
+        top-k. Results are cached per request; the cache key includes the
+        model version, so results never outlive a rebuild or an update of
+        the catalog.
+        
+        Args:
+            requests: List of (movie index, limit, exclude) tuples, where
+                exclude is an optional iterable of movie indices or titles
+            scan: Whether to score the seeds that neither the cache nor the
+                neighbor table can answer
+            
+        Returns:
+            List of (indices, scores) tuples ordered by descending
+            similarity, one per request; None for the seeds left unscored
+            when scan is False
+        """
+        results = [None] * len(requests)
+        keys = [None] * len(requests)
+        masks = {}
+        pending = []
+        
+        for position, (movie_idx, limit, exclude) in enumerate(requests):
+            if self.result_cache is not None:
+                keys[position] = (int(movie_idx), limit, self.exclusion_key(exclude), self.version)
+                cached = self.result_cache.get(keys[position])
+                if cached is not None:
+                    results[position] = cached
+                    keys[position] = None
+                    continue
+            
+            masks[position] = self.exclusion_mask(movie_idx, exclude)
+            results[position] = self.lookup_neighbors(movie_idx, limit, masks[position])
+            if results[position] is None:
+                pending.append(position)
+        
+        if not scan:
+            for position in pending:
+                keys[position] = None
+            pending = []
+        
+        if self.ann_index is not None:
+            for position in pending:
+                movie_idx, limit, _ = requests[position]
+                movie_vector = self.item_vectors[movie_idx:movie_idx + 1]
+                results[position] = self.ann_index.search(self.item_vectors, movie_vector, limit, exclude=masks[position])
+        elif pending:
+            n_movies = self.item_vectors.shape[0]
+            chunk_size = self.neighbor_chunk_size or max(1, NEIGHBOR_BLOCK_BYTES // (n_movies * 8))
+            for start in range(0, len(pending), chunk_size):
+                positions = pending[start:start + chunk_size]
+                
+                # Calculate cosine similarity of every seed in the block with all movies
+                block = self.score(self.item_vectors[[requests[position][0] for position in positions]])
+                for row, position in enumerate(positions):
+                    results[position] = top_k(block[row], requests[position][1], exclude=masks[position])
+        
+        for position, key in enumerate(keys):
+            if key is not None:
+                indices, scores = results[position]
+                # Shared between requests from now on
+                indices.setflags(write=False)
+                scores.setflags(write=False)
+                self.result_cache.put(key, results[position])
+        
+        return results
+    
+    def lookup_neighbors(self, movie_idx, limit, mask):
+        """
+        Serve a recommendation straight from the precomputed neighbor table.
         
-        # Try partial match
-        partial_match = self.df[self.df['title'].str.lower().str.contains(movie_title_lower, na=False)]
-        if not partial_match.empty:
-            return partial_match.index[0]
+        Args:
+            movie_idx: Index of the seed movie
+            limit: Number of recommendations to return
+            mask: Boolean array of excluded movies
+            
+        Returns:
+            Tuple of (indices, scores), or None when the table is missing,
+            too short for limit or has too few neighbors left after the
+            exclusions
+        """
+        if self.neighbor_indices is None or limit > self.neighbor_indices.shape[1]:
+            return None
         
+        candidates = self.neighbor_indices[movie_idx]
+        keep = ~mask[candidates]
+        if keep.sum() >= limit or keep.size == len(mask) - 1:
+            return candidates[keep][:limit], self.neighbor_scores[movie_idx][keep][:limit]
         return None
     
-    def get_recommendations(self, movie_title, limit=5):
+    def get_recommendations(self, movie_title, limit=5, exclude=None):
         """
         Get movie recommendations based on a given movie title.
         
         Args:
             movie_title: Title of the movie to get recommendations for
             limit: Number of recommendations to return
+            exclude: Optional iterable of movie indices or titles to skip
             
         Returns:
-            Dictionary containing the requested movie and list of recommendations
+            Dictionary containing the matched movie, how it was matched
+            (match_type and match_confidence) and list of recommendations
         """
-        if not self.is_loaded or self.tfidf_matrix is None:
-            self.build_model()
+        return self.get_recommendations_batch([(movie_title, limit, exclude)])[0]
+    
+    def get_cached_recommendations(self, movie_title, limit=5, exclude=None):
+        """
+        Get recommendations only if they need no similarity scan.
         
-        # Find the movie index
-        movie_idx = self.find_movie_index(movie_title)
+        Answers from the result cache or the neighbor table, so callers can
+        return at once and keep batching for the seeds that must be scored.
         
-        if movie_idx is None:
-            return {
-                "error": f"Movie '{movie_title}' not found in the database.",
-                "requested_movie": movie_title,
-                "recommendations": []
-            }
+        Args:
+            movie_title: Title or index of the movie to get recommendations for
+            limit: Number of recommendations to return
+            exclude: Optional iterable of movie indices or titles to skip
+            
+        Returns:
+            Dictionary as returned by get_recommendations(), or None when
+            the movie has to be scored against the catalog
+        """
+        return self.get_recommendations_batch([(movie_title, limit, exclude)], scan=False)[0]
+    
+    def get_recommendations_batch(self, requests, scan=True):
+        """
+        Get recommendations for several movies in one pass.
         
-        # Get the TF-IDF vector for the requested movie
-        movie_vector = self.tfidf_matrix[movie_idx]
+        Titles are resolved one by one, then every seed is scored together
+        by recommend_indices_batch().
         
-        # Calculate cosine similarity with all movies
-        similarity_scores = cosine_similarity(movie_vector, self.tfidf_matrix).flatten()
+        Args:
+            requests: List of (movie, limit, exclude) tuples, where movie is
+                a title or a movie index
+            scan: Whether to score movies that neither the result cache nor
+                the neighbor table can answer
+            
+        Returns:
+            List of result dictionaries as returned by get_recommendations(),
+            one per request (match_type 'id' for movie indices); a movie that
+            is not found gets an error entry without failing the others, and
+            a movie left unscored when scan is False gets None
+        """
+        if not self.is_loaded or self.tfidf_matrix is None:
+            self.build_model()
         
-        # Get indices of most similar movies (excluding the movie itself)
-        similar_indices = np.argsort(similarity_scores)[::-1][1:limit+1]
+        with self.state_lock.read():
+            results = [None] * len(requests)
+            matches = []
+            for position, (movie_title, _, _) in enumerate(requests):
+                if isinstance(movie_title, (int, np.integer)):
+                    if 0 <= movie_title < len(self.catalog):
+                        matches.append((position, (int(movie_title), 'id', 1.0)))
+                    else:
+                        results[position] = {
+                            "error": f"Movie id {movie_title} does not exist.",
+                            "requested_movie": movie_title,
+                            "recommendations": []
+                        }
+                    continue
+                
+                # Find the movie index
+                match = self.resolve_title(movie_title)
+                if match is None:
+                    results[position] = self.title_not_found(movie_title)
+                else:
+                    matches.append((position, match))
+            
+            similar = self.recommend_indices_batch([
+                (match[0], requests[position][1], requests[position][2])
+                for position, match in matches
+            ], scan=scan)
+            
+            for (position, match), found in zip(matches, similar):
+                if found is None:
+                    continue
+                similar_indices, similar_scores = found
+                movie_idx, match_type, match_confidence = match
+                results[position] = {
+                    "requested_movie": self.catalog.titles[movie_idx],
+                    "movie_id": movie_idx,
+                    "match_type": match_type,
+                    "match_confidence": round(match_confidence, 3),
+                    "recommendations": self.recommendation_list(similar_indices, similar_scores)
+                }
+            
+            return results
+    
+    def title_not_found(self, movie_title):
+        """
+        Build the result entry for a title that matches no movie.
         
-        # Build recommendations list
+        Args:
+            movie_title: Title as supplied by the user
+            
+        Returns:
+            Dictionary with an error message and no recommendations
+        """
+        return {
+            "error": f"Movie '{movie_title}' not found in the database.",
+            "requested_movie": movie_title,
+            "recommendations": []
+        }
+    
+    def recommendation_list(self, indices, scores):
+        """
+        Build the response entries for ranked movies.
+        
+        Args:
+            indices: Movie indices, best first
+            scores: Similarity score of each movie
+            
+        Returns:
+            List of movie dictionaries with a similarity_score field
+        """
         recommendations = []
-        for idx in similar_indices:
-            movie_data = {
-                "title": self.df.iloc[idx]['title'],
-                "overview": self.df.iloc[idx]['overview'],
-                "similarity_score": float(similarity_scores[idx])
-            }
-            # Add poster URL if available
-            if 'poster' in self.df.columns:
-                poster = self.df.iloc[idx].get('poster')
-                if pd.notna(poster) and str(poster).strip() and str(poster) != 'nan':
-                    movie_data["poster"] = str(poster).strip()
+        for idx, score in zip(indices, scores):
+            movie_data = self.movie_info(idx)
+            movie_data["similarity_score"] = float(score)
             recommendations.append(movie_data)
+        return recommendations
+    
+    def query_vector(self, text):
+        """
+        Vectorize free text for scoring, through the query-vector cache.
         
-        return {
-            "requested_movie": self.df.iloc[movie_idx]['title'],
-            "recommendations": recommendations
-        }
+        Args:
+            text: Raw query text
+            
+        Returns:
+            Query vector of shape (1, n_features) in the scoring space
+        """
+        cleaned = self.clean_text(text)
+        if self.query_cache is None:
+            return self.transform_texts([cleaned])
+        
+        key = (cleaned, self.version)
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = self.transform_texts([cleaned])
+            self.query_cache.put(key, vector)
+        return vector
+    
+    def recommend_text_indices(self, text, limit=5, exclude=None):
+        """
+        Find the movies whose overviews are most similar to free text.
+        
+        Args:
+            text: Description such as "a heist movie in space"
+            limit: Number of recommendations to return
+            exclude: Optional iterable of movie indices or titles to skip
+            
+        Returns:
+            Tuple of (indices, scores) ordered by descending similarity;
+            movies sharing no terms with the text are left out
+        """
+        query = self.query_vector(text)
+        mask = self.exclusion_mask(None, exclude)
+        
+        if self.ann_index is not None:
+            indices, scores = self.ann_index.search(self.item_vectors, query, limit, exclude=mask)
+        else:
+            indices, scores = top_k(self.score(query).ravel(), limit, exclude=mask)
+        
+        related = scores > 0
+        return indices[related], scores[related]
+    
+    def recommend_text(self, text, limit=5, exclude=None):
+        """
+        Get movie recommendations for a free-text description.
+        
+        Args:
+            text: Description of the wanted movie
+            limit: Number of recommendations to return
+            exclude: Optional iterable of movie indices or titles to skip
+            
+        Returns:
+            Dictionary containing the query and list of recommendations, with
+            an error message when no movie matches the description
+        """
+        if not self.is_loaded or self.tfidf_matrix is None:
+            self.build_model()
+        
+        with self.state_lock.read():
+            indices, scores = self.recommend_text_indices(text, limit, exclude)
+            if len(indices) == 0:
+                return {
+                    "error": f"No movies match the description '{text}'.",
+                    "query": text,
+                    "recommendations": []
+                }
+            
+            return {
+                "query": text,
+                "recommendations": self.recommendation_list(indices, scores)
+            }
 
 
 # Global model instance (will be initialized in main.py)
@@ -0,0 +1,162 @@
+"""
+Multi-process sharded vectorization that reproduces the single-process build
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+
+
+def count_shard(args):
+    """
+    Tokenize and count one shard with its own local vocabulary.
+
+    Mirrors CountVectorizer's counting loop; sharded_counts() then
+    renumbers the local features into the order a single pass would use.
+
+    Args:
+        args: Tuple of (documents, vectorizer parameters)
+
+    Returns:
+        Tuple of (terms in local id order, data, indices, indptr)
+    """
+    docs, params = args
+    analyze = CountVectorizer(**params).build_analyzer()
+
+    vocabulary = {}
+    indices = []
+    data = []
+    indptr = [0]
+    for doc in docs:
+        counter = {}
+        for feature in analyze(doc):
+            feature_idx = vocabulary.setdefault(feature, len(vocabulary))
+            counter[feature_idx] = counter.get(feature_idx, 0) + 1
+        indices.extend(counter.keys())
+        data.extend(counter.values())
+        indptr.append(len(indices))
+
+    return (
+        list(vocabulary),
+        np.asarray(data, dtype=np.float64),
+        np.asarray(indices, dtype=np.int64),
+        np.asarray(indptr, dtype=np.int64)
+    )
+
+
+def hash_shard(args):
+    """
+    Count hashed terms for one shard.
+
+    Args:
+        args: Tuple of (documents, HashingVectorizer parameters)
+
+    Returns:
+        Sparse CSR count matrix
+    """
+    docs, params = args
+    return HashingVectorizer(**params).transform(docs)
+
+
+def split_shards(docs, n_shards):
+    """Split documents into n_shards contiguous, nearly equal shards."""
+    bounds = np.linspace(0, len(docs), n_shards + 1).astype(int)
+    return [docs[start:stop] for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def sharded_counts(docs, params, n_jobs, timings):
+    """
+    Count terms over shards in worker processes and merge the results.
+
+    The merged vocabulary is sorted alphabetically and limited to the
+    max_features most frequent terms with the same selection as
+    CountVectorizer, so the result is identical to a single-process
+    CountVectorizer(**params).fit_transform(docs).
+
+    Args:
+        docs: List of preprocessed documents
+        params: CountVectorizer parameters (max_features, stop_words, ngram_range)
+        n_jobs: Number of worker processes
+        timings: Dict that receives the duration of each phase in seconds
+
+    Returns:
+        Tuple of (vocabulary dict, sparse CSR float64 count matrix)
+    """
+    start = time.perf_counter()
+    shards = split_shards(docs, n_jobs)
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        results = list(executor.map(count_shard, [(shard, params) for shard in shards]))
+    timings['count_shards'] = time.perf_counter() - start
+
+    # Merge vocabularies. Features are first numbered by first occurrence in
+    # the whole corpus, which is how CountVectorizer numbers them before it
+    # sorts each row's indices
+    start = time.perf_counter()
+    corpus_ids = {}
+    for shard_terms, _, _, _ in results:
+        for term in shard_terms:
+            corpus_ids.setdefault(term, len(corpus_ids))
+    timings['merge_vocabulary'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    blocks = []
+    for shard_terms, data, indices, indptr in results:
+        local_to_corpus = np.fromiter((corpus_ids[term] for term in shard_terms), dtype=np.int64, count=len(shard_terms))
+        blocks.append(sp.csr_matrix(
+            (data, local_to_corpus[indices], indptr),
+            shape=(len(indptr) - 1, len(corpus_ids))
+        ))
+    counts = sp.vstack(blocks, format='csr')
+    counts.sort_indices()
+    timings['stack_shards'] = time.perf_counter() - start
+
+    # Renumber features alphabetically, keeping the in-row order
+    start = time.perf_counter()
+    terms = sorted(corpus_ids)
+    map_index = np.empty(len(terms), dtype=np.int64)
+    for new_id, term in enumerate(terms):
+        map_index[corpus_ids[term]] = new_id
+    index_dtype = np.int32 if counts.nnz <= np.iinfo(np.int32).max else np.int64
+    counts.indices = map_index.take(counts.indices).astype(index_dtype)
+    counts.indptr = counts.indptr.astype(index_dtype)
+    timings['sort_features'] = time.perf_counter() - start
+
+    # Keep the max_features most frequent terms, exactly as CountVectorizer does
+    start = time.perf_counter()
+    max_features = params.get('max_features')
+    if max_features is not None and len(terms) > max_features:
+        term_freqs = np.asarray(counts.sum(axis=0)).ravel()
+        mask = np.zeros(len(terms), dtype=bool)
+        mask[(-term_freqs).argsort()[:max_features]] = True
+        kept = np.where(mask)[0]
+        counts = counts[:, kept]
+        terms = [terms[i] for i in kept]
+    timings['limit_features'] = time.perf_counter() - start
+
+    return {term: i for i, term in enumerate(terms)}, counts
+
+
+def sharded_hash_counts(docs, params, n_jobs, timings):
+    """
+    Count hashed terms over shards in worker processes.
+
+    Args:
+        docs: List of preprocessed documents
+        params: HashingVectorizer parameters
+        n_jobs: Number of worker processes
+        timings: Dict that receives the duration of each phase in seconds
+
+    Returns:
+        Sparse CSR count matrix, identical to a single-process transform
+    """
+    start = time.perf_counter()
+    shards = split_shards(docs, n_jobs)
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        blocks = list(executor.map(hash_shard, [(shard, params) for shard in shards]))
+    timings['count_shards'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    counts = sp.vstack(blocks, format='csr')
+    timings['stack_shards'] = time.perf_counter() - start
+    return counts
@@ -0,0 +1,78 @@
+"""
+Batch text cleaning for the movie overviews
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+
+# Compiled once and shared by the single-text and batch cleaners
+NON_ALPHANUMERIC = re.compile(r'[^a-z0-9\s]')
+WHITESPACE = re.compile(r'\s+')
+
+# Rows per chunk handed to a worker process; smaller inputs are cleaned in-process
+PREPROCESS_CHUNK_ROWS = 50000
+
+
+def resolve_n_jobs(n_jobs):
+    """
+    Turn an n_jobs setting into a worker count.
+    
+    Args:
+        n_jobs: Number of workers; -1 (or any value < 1) means all CPU cores
+        
+    Returns:
+        Positive number of workers
+    """
+    if n_jobs is None or n_jobs < 1:
+        return os.cpu_count() or 1
+    return n_jobs
+
+
+def clean_texts(texts):
+    """
+    Clean a batch of texts with vectorized string operations.
+    
+    Equivalent to MovieRecommendationModel.clean_text applied to every item:
+    lowercase, drop everything but [a-z0-9] and whitespace, collapse whitespace.
+    
+    Args:
+        texts: Sequence of strings (missing values become "")
+        
+    Returns:
+        List of cleaned strings
+    """
+    series = pd.Series(texts, dtype=object).fillna('').astype(str)
+    cleaned = (
+        series.str.lower()
+        .str.replace(NON_ALPHANUMERIC, '', regex=True)
+        .str.replace(WHITESPACE, ' ', regex=True)
+        .str.strip()
+    )
+    return cleaned.tolist()
+
+
+def preprocess_texts(texts, n_jobs=1, chunk_rows=PREPROCESS_CHUNK_ROWS):
+    """
+    Clean a corpus, fanning chunks out over a process pool when it is large.
+    
+    Args:
+        texts: Sequence of raw strings
+        n_jobs: Number of worker processes (-1 for all cores)
+        chunk_rows: Rows per chunk sent to a worker
+        
+    Returns:
+        List of cleaned strings, in input order
+    """
+    texts = list(texts)
+    n_jobs = resolve_n_jobs(n_jobs)
+    if n_jobs == 1 or len(texts) <= chunk_rows:
+        return clean_texts(texts)
+    
+    chunks = [texts[start:start + chunk_rows] for start in range(0, len(texts), chunk_rows)]
+    cleaned = []
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        for chunk in executor.map(clean_texts, chunks):
+            cleaned.extend(chunk)
+    return cleaned
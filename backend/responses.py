@@ -0,0 +1,121 @@
+"""
+Fast JSON responses that splice pre-encoded catalog fields
+"""
+import json
+import numpy as np
+from fastapi.responses import Response
+from catalog import MovieRecord
+try:
+    import orjson
+except ImportError:  # listed in requirements.txt; falls back to the standard library encoder
+    orjson = None
+
+
+def _default(value):
+    """Convert numpy scalars and arrays, which the encoders do not know."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    """
+    Encode a value as compact UTF-8 JSON.
+
+    Uses orjson when it is installed and the standard library otherwise.
+
+    Args:
+        value: JSON-compatible value (numpy scalars and arrays allowed)
+
+    Returns:
+        bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# Encoded '"key":' prefixes, reused across responses
+_keys = {}
+
+
+def _key(key):
+    encoded = _keys.get(key)
+    if encoded is None:
+        encoded = _keys[key] = dumps(str(key)) + b':'
+    return encoded
+
+
+def _encode_record(record, parts):
+    json_columns = record.catalog.json_columns
+    separator = b'{'
+    for key, value in record.items():
+        parts.append(separator)
+        separator = b','
+        parts.append(_key(key))
+        if key in record.encoded:
+            parts.append(json_columns[key].raw(record.idx))
+        else:
+            _encode(value, parts)
+    if separator == b'{':
+        parts.append(separator)
+    parts.append(b'}')
+
+
+def _encode(value, parts):
+    if isinstance(value, MovieRecord):
+        _encode_record(value, parts)
+    elif isinstance(value, dict):
+        separator = b'{'
+        for key, item in value.items():
+            parts.append(separator)
+            separator = b','
+            parts.append(_key(key))
+            _encode(item, parts)
+        if separator == b'{':
+            parts.append(separator)
+        parts.append(b'}')
+    elif isinstance(value, (list, tuple)):
+        # Lists of plain values are encoded in one call
+        if not any(isinstance(item, (dict, list, tuple)) for item in value):
+            parts.append(dumps(value))
+            return
+        separator = b'['
+        for item in value:
+            parts.append(separator)
+            separator = b','
+            _encode(item, parts)
+        if separator == b'[':
+            parts.append(separator)
+        parts.append(b']')
+    else:
+        parts.append(dumps(value))
+
+
+def render(content):
+    """
+    Encode a response body.
+
+    MovieRecord values contribute the stored JSON of their unchanged
+    catalog fields; everything else goes through dumps().
+
+    Args:
+        content: JSON-compatible value, possibly containing MovieRecords
+
+    Returns:
+        bytes
+    """
+    parts = []
+    _encode(content, parts)
+    return b''.join(parts)
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded with render() instead of FastAPI's encoder."""
+
+    media_type = "application/json"
+
+    def render(self, content):
+        return render(content)
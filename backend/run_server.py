@@ -8,6 +8,15 @@ import os
 # Add backend directory to path so imports work
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Worker processes; with more than one, the model artifact is built once up
+# front and every worker memory-maps it read-only
+WORKERS = int(os.getenv("MOVIE_WORKERS", "1"))
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+    if WORKERS > 1:
+        from main import prepare_artifact
+        prepare_artifact()
+        uvicorn.run("main:app", host="127.0.0.1", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
 
@@ -0,0 +1,60 @@
+"""
+Deduplication of identical in-flight requests
+"""
+import asyncio
+
+
+class SingleFlight:
+    """
+    Shares one computation between concurrent calls with the same key.
+
+    The first call for a key starts the work; calls for the same key that
+    arrive while it runs await that result instead of starting their own.
+    Once the work finishes the key is forgotten, so unlike a cache this
+    never serves a result computed before the call was made.
+
+    Runs on the event loop. The work keeps running if the caller that
+    started it is cancelled, so the other callers still get their result.
+    """
+
+    def __init__(self):
+        self.in_flight = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, func, *args, **kwargs):
+        """
+        Await func(*args, **kwargs), or the run already in flight for key.
+
+        Args:
+            key: Hashable key identifying the computation
+            func: Coroutine function doing the work
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The result of func; callers sharing a run get the same object
+        """
+        self.calls += 1
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        """
+        Report deduplication activity.
+
+        Returns:
+            Dictionary with the number of calls, calls that joined a run
+            already in flight and runs currently in flight
+        """
+        return {
+            'calls': self.calls,
+            'shared': self.shared,
+            'in_flight': len(self.in_flight)
+        }
@@ -0,0 +1,949 @@
+"""
+Normalized title lookup tables for resolving user-supplied movie titles
+"""
+import re
+import heapq
+import hashlib
+from bisect import bisect_left, bisect_right
+from collections import deque
+import numpy as np
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+from catalog import StringColumn
+from compact import FrozenVocabulary
+
+
+# Leading articles that users commonly drop ("Matrix" for "The Matrix")
+ARTICLES = ('the ', 'a ', 'an ')
+
+APOSTROPHES = re.compile(r"['’]")
+PUNCTUATION = re.compile(r'[^\w\s]|_')
+WHITESPACE = re.compile(r'\s+')
+
+# Fuzzy matching: candidates verified per query, the cap on edits allowed
+# and on the posting list entries counted per query
+FUZZY_CANDIDATES = 50
+MAX_EDITS = 3
+FUZZY_POSTINGS = 100000
+
+# Sorts after every normalized key that starts with a given prefix
+PREFIX_END = '\U0010ffff'
+
+# Trigrams are packed into one integer, 21 bits per code point
+CODE_BITS = 21
+
+
+def normalize_title(title):
+    """
+    Normalize a title for lookups.
+
+    Casefolds, drops apostrophes, replaces other punctuation with spaces and
+    collapses whitespace, so "Harry Potter and the Philosopher's Stone!"
+    becomes "harry potter and the philosophers stone".
+
+    Args:
+        title: Raw title string
+
+    Returns:
+        Normalized title string
+    """
+    text = APOSTROPHES.sub('', str(title).casefold())
+    text = PUNCTUATION.sub(' ', text)
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def strip_article(normalized_title):
+    """
+    Remove a leading article from a normalized title.
+
+    Args:
+        normalized_title: Output of normalize_title()
+
+    Returns:
+        The title without its leading article (unchanged if it has none)
+    """
+    for article in ARTICLES:
+        if normalized_title.startswith(article) and len(normalized_title) > len(article):
+            return normalized_title[len(article):]
+    return normalized_title
+
+
+def trigrams(text):
+    """
+    List the distinct character trigrams of a string.
+
+    Args:
+        text: Normalized string
+
+    Returns:
+        List of 3-character substrings
+    """
+    return list(dict.fromkeys(text[i:i + 3] for i in range(len(text) - 2)))
+
+
+def gram_code(text):
+    """
+    Pack up to three characters into one integer.
+
+    Args:
+        text: String of at most three characters
+
+    Returns:
+        Integer with CODE_BITS bits per code point, first character highest
+    """
+    code = 0
+    for char in text:
+        code = (code << CODE_BITS) | ord(char)
+    return code
+
+
+def key_hash(key):
+    """Stable 64-bit hash of a normalized key (the same in every process)."""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def build_postings(keys):
+    """
+    Build the trigram inverted index of normalized titles.
+
+    Every title is padded with a space on both sides, so word boundaries
+    at both ends form trigrams too. The work is done on one UTF-32 array of
+    all titles, so no Python object is created per trigram.
+
+    Args:
+        keys: Normalized titles, in movie index order
+
+    Returns:
+        Tuple of (sorted unique trigram codes as uint64, int64 offsets with
+        one more entry than codes, int32 movie indices), where the posting
+        list of codes[i] is ids[offsets[i]:offsets[i + 1]], ascending
+    """
+    padded = [f' {key} ' for key in keys]
+    lengths = np.fromiter((len(text) for text in padded), dtype=np.int64, count=len(padded))
+    chars = np.frombuffer(''.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+    windows = np.maximum(lengths - 2, 0)
+    starts = np.cumsum(lengths) - lengths
+    first_window = np.cumsum(windows) - windows
+    ids = np.repeat(np.arange(len(padded), dtype=np.int32), windows)
+    positions = np.arange(len(ids)) - np.repeat(first_window - starts, windows)
+    codes = (chars[positions] << 2 * CODE_BITS) | (chars[positions + 1] << CODE_BITS) | chars[positions + 2]
+
+    # Sort by trigram, then movie, and drop trigrams repeated within a title
+    order = np.lexsort((ids, codes))
+    codes = codes[order]
+    ids = ids[order]
+    distinct = np.ones(len(codes), dtype=bool)
+    distinct[1:] = (codes[1:] != codes[:-1]) | (ids[1:] != ids[:-1])
+    codes = codes[distinct]
+    ids = ids[distinct]
+
+    unique_codes, counts = np.unique(codes, return_counts=True)
+    offsets = np.zeros(len(unique_codes) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return unique_codes.astype(np.uint64), offsets, ids
+
+
+def max_edits(key):
+    """Edits tolerated for a query: about one per four characters, at least one."""
+    return min(MAX_EDITS, max(1, len(key) // 4))
+
+
+def bounded_edit_distance(a, b, max_distance):
+    """
+    Levenshtein distance that gives up once it exceeds max_distance.
+
+    Only the cells within max_distance of the diagonal are computed, since
+    the others cannot lead to a distance within the bound.
+
+    Args:
+        a: First string
+        b: Second string
+        max_distance: Largest distance of interest
+
+    Returns:
+        The edit distance, or max_distance + 1 if it is larger
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) > len(b):
+        a, b = b, a
+
+    beyond = max_distance + 1
+    previous = [j if j <= max_distance else beyond for j in range(len(a) + 1)]
+    for i, char_b in enumerate(b, 1):
+        low = max(1, i - max_distance)
+        high = min(len(a), i + max_distance)
+        current = [beyond] * (len(a) + 1)
+        if i <= max_distance:
+            current[0] = i
+        for j in range(low, high + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[j - 1] != char_b)
+            )
+        if min(current[low - 1:high + 1]) > max_distance:
+            return beyond
+        previous = current
+    return min(previous[-1], beyond)
+
+
+class SortedKeys:
+    """
+    Sequence view of the normalized titles and aliases in sorted order.
+
+    The sort order is stored as movie indices only; entry i is read from
+    the title column, so bisect can search it without a copy of every key.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return len(self.index.sorted_ids)
+
+    def __getitem__(self, position):
+        key = self.index.keys[int(self.index.sorted_ids[position])]
+        return strip_article(key) if self.index.sorted_alias[position] else key
+
+
+class TitleIndex:
+    """
+    Exact, prefix and substring lookups over normalized movie titles.
+
+    Exact matches are binary searches over 64-bit key hashes, prefix
+    matches over the sorted keys. Titles starting with an article are also
+    reachable without it, but a movie whose real title matches wins over
+    such aliases. Substring matches
+    walk the rarest posting list of a character-trigram inverted index and
+    verify each candidate; fuzzy matches use the same index as a q-gram
+    count filter before a bounded edit distance.
+
+    Everything is stored in flat arrays (see arrays()), so the index is
+    saved with the model artifact and memory-mapped by every worker
+    instead of being rebuilt as Python objects in each process.
+    """
+
+    def __init__(self, keys, key_lengths, sorted_ids, sorted_alias, hashes, hash_ids, hash_alias,
+                 gram_codes, posting_offsets, posting_ids):
+        """
+        Wrap existing arrays.
+
+        Args:
+            keys: StringColumn of normalized titles, in movie index order
+            key_lengths: int32 length in characters of each normalized title
+            sorted_ids: int32 movie indices of the titles and aliases,
+                ordered by key, then movie index
+            sorted_alias: Boolean array, True where the sorted entry is a
+                title without its leading article
+            hashes: Sorted uint64 key_hash() of the titles and aliases
+            hash_ids: int32 movie index of each hash, ascending among
+                equal hashes
+            hash_alias: Boolean array, True where the hash is an alias's
+            gram_codes: Sorted uint64 trigram codes (see gram_code())
+            posting_offsets: int64 boundaries of each trigram's posting list
+            posting_ids: int32 movie indices of all posting lists
+        """
+        self.keys = keys
+        self.key_lengths = key_lengths
+        self.sorted_ids = sorted_ids
+        self.sorted_alias = sorted_alias
+        self.hashes = hashes
+        self.hash_ids = hash_ids
+        self.hash_alias = hash_alias
+        self.gram_codes = gram_codes
+        self.posting_offsets = posting_offsets
+        self.posting_ids = posting_ids
+        self.sorted_keys = SortedKeys(self)
+
+    @classmethod
+    def from_titles(cls, titles):
+        """
+        Build the index.
+
+        Args:
+            titles: Iterable of titles, in movie index order
+
+        Returns:
+            TitleIndex
+        """
+        keys = [normalize_title(title) for title in titles]
+
+        entries = []
+        for movie_idx, key in enumerate(keys):
+            entries.append((key, movie_idx, False))
+            alias = strip_article(key)
+            if alias != key:
+                entries.append((alias, movie_idx, True))
+        entries.sort()
+        hashed = sorted((key_hash(key), movie_idx, alias) for key, movie_idx, alias in entries)
+
+        return cls(
+            StringColumn.from_strings(keys),
+            np.fromiter((len(key) for key in keys), dtype=np.int32, count=len(keys)),
+            np.array([movie_idx for _, movie_idx, _ in entries], dtype=np.int32),
+            np.array([alias for _, _, alias in entries], dtype=bool),
+            np.array([value for value, _, _ in hashed], dtype=np.uint64),
+            np.array([movie_idx for _, movie_idx, _ in hashed], dtype=np.int32),
+            np.array([alias for _, _, alias in hashed], dtype=bool),
+            *build_postings(keys)
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def extend(self, titles):
+        """
+        Append titles; their movie indices follow the existing ones.
+
+        The new titles are indexed on their own and merged in with array
+        inserts, so no existing title is normalized or indexed again.
+
+        Args:
+            titles: Iterable of titles of the new movies
+        """
+        first_idx = len(self.keys)
+        tail = TitleIndex.from_titles(titles)
+
+        # Equal keys are ordered by movie index, and the new ones come last
+        positions = [
+            bisect_right(self.sorted_keys, tail.sorted_keys[position])
+            for position in range(len(tail.sorted_ids))
+        ]
+        sorted_ids = np.insert(self.sorted_ids, positions, tail.sorted_ids + first_idx)
+        sorted_alias = np.insert(self.sorted_alias, positions, tail.sorted_alias)
+        positions = np.searchsorted(self.hashes, tail.hashes, side='right')
+        hashes = np.insert(self.hashes, positions, tail.hashes)
+        hash_ids = np.insert(self.hash_ids, positions, tail.hash_ids + first_idx)
+        hash_alias = np.insert(self.hash_alias, positions, tail.hash_alias)
+
+        # New movies go at the end of the posting lists of known trigrams,
+        # and new trigrams get a list at their place in the sorted codes
+        found = np.searchsorted(self.gram_codes, tail.gram_codes)
+        known = np.zeros(len(found), dtype=bool)
+        if len(self.gram_codes):
+            known = self.gram_codes[np.minimum(found, len(self.gram_codes) - 1)] == tail.gram_codes
+        insert_at = self.posting_offsets[found + known]
+        tail_counts = np.diff(tail.posting_offsets)
+        posting_ids = np.insert(self.posting_ids, np.repeat(insert_at, tail_counts), tail.posting_ids + first_idx)
+
+        gram_codes = np.union1d(self.gram_codes, tail.gram_codes).astype(np.uint64)
+        counts = np.zeros(len(gram_codes), dtype=np.int64)
+        counts[np.searchsorted(gram_codes, self.gram_codes)] += np.diff(self.posting_offsets)
+        counts[np.searchsorted(gram_codes, tail.gram_codes)] += tail_counts
+        posting_offsets = np.zeros(len(gram_codes) + 1, dtype=np.int64)
+        np.cumsum(counts, out=posting_offsets[1:])
+
+        self.keys = self.keys.extend(tail.keys)
+        self.key_lengths = np.concatenate([self.key_lengths, tail.key_lengths])
+        self.sorted_ids = sorted_ids
+        self.sorted_alias = sorted_alias
+        self.hashes = hashes
+        self.hash_ids = hash_ids
+        self.hash_alias = hash_alias
+        self.gram_codes = gram_codes
+        self.posting_offsets = posting_offsets
+        self.posting_ids = posting_ids
+
+    def arrays(self):
+        """
+        Flatten the index into named arrays for persistence.
+
+        Returns:
+            Dictionary of array name to numpy array
+        """
+        return {
+            'title_keys_blob': self.keys.blob,
+            'title_keys_offsets': self.keys.offsets,
+            'title_key_lengths': self.key_lengths,
+            'title_sorted_ids': self.sorted_ids,
+            'title_sorted_alias': self.sorted_alias,
+            'title_hashes': self.hashes,
+            'title_hash_ids': self.hash_ids,
+            'title_hash_alias': self.hash_alias,
+            'title_gram_codes': self.gram_codes,
+            'title_posting_offsets': self.posting_offsets,
+            'title_posting_ids': self.posting_ids
+        }
+
+    @classmethod
+    def from_arrays(cls, read_array):
+        """
+        Rebuild an index persisted with arrays().
+
+        Args:
+            read_array: Callable returning the array stored under a name
+
+        Returns:
+            TitleIndex
+        """
+        return cls(
+            StringColumn(read_array('title_keys_blob'), read_array('title_keys_offsets')),
+            read_array('title_key_lengths'),
+            read_array('title_sorted_ids'),
+            read_array('title_sorted_alias'),
+            read_array('title_hashes'),
+            read_array('title_hash_ids'),
+            read_array('title_hash_alias'),
+            read_array('title_gram_codes'),
+            read_array('title_posting_offsets'),
+            read_array('title_posting_ids')
+        )
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays().values())
+
+    def equal_range(self, key):
+        """Positions in the sorted keys of the entries equal to key."""
+        start = bisect_left(self.sorted_keys, key)
+        return start, bisect_right(self.sorted_keys, key, start)
+
+    def hash_matches(self, key):
+        """
+        Find the titles and aliases equal to a normalized key.
+
+        Args:
+            key: Normalized key
+
+        Returns:
+            List of (movie index, is alias) pairs, by movie index
+        """
+        value = np.uint64(key_hash(key))
+        start = np.searchsorted(self.hashes, value)
+        stop = np.searchsorted(self.hashes, value, side='right')
+        matches = []
+        for movie_idx, alias in zip(self.hash_ids[start:stop].tolist(), self.hash_alias[start:stop].tolist()):
+            title_key = self.keys[movie_idx]
+            # Hash collisions are possible, so compare the keys themselves
+            if (strip_article(title_key) if alias else title_key) == key:
+                matches.append((movie_idx, alias))
+        return matches
+
+    def lookup_exact(self, query):
+        """
+        Resolve a title that matches a catalog title after normalization.
+
+        Args:
+            query: User-supplied title
+
+        Returns:
+            Movie index, or None if there is no exact match
+        """
+        key = normalize_title(query)
+        if not key:
+            return None
+
+        found = [self.hash_matches(candidate) for candidate in dict.fromkeys((key, strip_article(key)))]
+        # Real titles first, then aliases; the lowest movie index wins
+        for alias in (False, True):
+            for matches in found:
+                for movie_idx, is_alias in matches:
+                    if is_alias == alias:
+                        return movie_idx
+        return None
+
+    def ids_for(self, query):
+        """
+        List every movie whose normalized title equals the query's.
+
+        Args:
+            query: User-supplied title
+
+        Returns:
+            List of movie indices (empty if none match)
+        """
+        return [movie_idx for movie_idx, alias in self.hash_matches(normalize_title(query)) if not alias]
+
+    def lookup_prefix(self, query):
+        """
+        Resolve a title that a catalog title starts with.
+
+        Args:
+            query: User-supplied title
+
+        Returns:
+            Index of the movie with the alphabetically first matching
+            title, or None if no title starts with the query
+        """
+        key = normalize_title(query)
+        if not key:
+            return None
+
+        for candidate in dict.fromkeys((key, strip_article(key))):
+            position = bisect_left(self.sorted_keys, candidate)
+            if position < len(self.sorted_keys) and self.sorted_keys[position].startswith(candidate):
+                return int(self.sorted_ids[position])
+        return None
+
+    def posting_lists(self, grams):
+        """
+        Look up the posting lists of several trigrams at once.
+
+        Args:
+            grams: List of 3-character strings
+
+        Returns:
+            List of int32 arrays of movie indices (empty for unknown trigrams)
+        """
+        codes = np.array([gram_code(gram) for gram in grams], dtype=np.uint64)
+        found = np.searchsorted(self.gram_codes, codes)
+        lists = []
+        for gram_idx, code in zip(found.tolist(), codes):
+            if gram_idx < len(self.gram_codes) and self.gram_codes[gram_idx] == code:
+                lists.append(self.posting_ids[self.posting_offsets[gram_idx]:self.posting_offsets[gram_idx + 1]])
+            else:
+                lists.append(self.posting_ids[:0])
+        return lists
+
+    def substring_matches(self, key):
+        """
+        Iterate over the movies whose normalized title contains a normalized query.
+
+        Lazy and in increasing movie index order, so callers that need only
+        the first few matches stop early. Queries of three or more characters
+        walk the rarest posting list of their trigrams and verify each
+        candidate. Shorter queries merge the posting lists of every trigram
+        with the query in its middle, which covers each occurrence exactly
+        (titles are padded with a space on both sides).
+
+        Args:
+            key: Normalized query string
+
+        Yields:
+            Movie indices
+        """
+        grams = trigrams(key)
+        if grams:
+            rarest = min(self.posting_lists(grams), key=len)
+            # Trigrams can match out of order, so verify each candidate
+            return (int(movie_idx) for movie_idx in rarest if key in self.keys[movie_idx])
+
+        shift = np.uint64(CODE_BITS * (2 - len(key)))
+        mask = np.uint64((1 << (CODE_BITS * len(key))) - 1)
+        middle = np.flatnonzero(((self.gram_codes >> shift) & mask) == gram_code(key))
+        lists = [
+            self.posting_ids[self.posting_offsets[gram_idx]:self.posting_offsets[gram_idx + 1]]
+            for gram_idx in middle.tolist()
+        ]
+        return self._unique(heapq.merge(*lists))
+
+    @staticmethod
+    def _unique(movie_ids):
+        """Drop repeats from a sorted stream of movie indices."""
+        previous = None
+        for movie_idx in movie_ids:
+            if movie_idx != previous:
+                yield int(movie_idx)
+                previous = movie_idx
+
+    def lookup_substring(self, query):
+        """
+        Resolve a title contained anywhere in a catalog title.
+
+        Args:
+            query: User-supplied title
+
+        Returns:
+            Index of the first movie whose title contains the query, or None
+        """
+        key = normalize_title(query)
+        if not key:
+            return None
+
+        return next(self.substring_matches(key), None)
+
+    def lookup_fuzzy(self, query):
+        """
+        Resolve a misspelled title ("interstelar", "the godfarther").
+
+        A title within k edits of the query shares all but at most 3k of its
+        padded trigrams, so it must appear in one of the 3k + 1 rarest
+        posting lists of the query. Those lists give the candidates, counted
+        with numpy after dropping titles whose length rules them out; the
+        ones sharing the most trigrams are verified with a bounded edit
+        distance, with and without leading articles. Queries made of common
+        words have long lists, so at most FUZZY_POSTINGS entries are counted
+        (the rarest list always is).
+
+        Args:
+            query: User-supplied title
+
+        Returns:
+            Tuple of (movie index, confidence between 0 and 1), or None if
+            no title is close enough
+        """
+        key = normalize_title(query)
+        if not key:
+            return None
+
+        limit = max_edits(key)
+        lists = sorted(self.posting_lists(trigrams(f' {key} ')), key=len)[:3 * limit + 1]
+
+        counted = lists[:1]
+        total = len(lists[0])
+        for posting in lists[1:]:
+            total += len(posting)
+            if total > FUZZY_POSTINGS:
+                break
+            counted.append(posting)
+        candidates = np.concatenate(counted)
+
+        # Within limit edits, with or without a leading article on either
+        # side, the lengths differ by at most limit + len('the ')
+        gap = np.abs(self.key_lengths[candidates] - len(key))
+        movie_ids, counts = np.unique(candidates[gap <= limit + len(ARTICLES[0])], return_counts=True)
+        ranked = movie_ids[np.argsort(-counts, kind='stable')[:FUZZY_CANDIDATES]]
+
+        query_alias = strip_article(key)
+        best = None
+        bound = limit
+        for movie_idx in ranked.tolist():
+            title_key = self.keys[movie_idx]
+            distance = min(
+                bounded_edit_distance(key, title_key, bound),
+                bounded_edit_distance(query_alias, strip_article(title_key), bound)
+            )
+            if distance > bound:
+                continue
+            candidate = (distance, movie_idx)
+            if best is None or candidate < best:
+                best = candidate
+                # Later candidates only matter if they are at least as close
+                bound = distance
+
+        if best is None:
+            return None
+
+        distance, movie_idx = best
+        confidence = 1 - distance / max(len(key), len(self.keys[movie_idx]))
+        return movie_idx, confidence
+
+    def search(self, query, limit=10):
+        """
+        Search titles containing the query, ranked exact > prefix > substring.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results
+
+        Returns:
+            List of movie indices, best matches first
+        """
+        key = normalize_title(query)
+        if not key or limit <= 0:
+            return []
+
+        # Exact and prefix matches, titles and article-less aliases alike,
+        # are adjacent ranges of the sorted keys
+        start, middle = self.equal_range(key)
+        end = bisect_left(self.sorted_keys, key + PREFIX_END, middle)
+
+        results = sorted(set(self.sorted_ids[start:middle].tolist()))[:limit]
+        seen = set(results)
+        if len(results) < limit and end > middle:
+            prefixed = set(self.sorted_ids[middle:end].tolist()) - seen
+            results.extend(heapq.nsmallest(limit - len(results), prefixed))
+            seen.update(results)
+
+        # Substring matches, in movie order, until the limit is reached
+        if len(results) < limit:
+            for movie_idx in self.substring_matches(key):
+                if movie_idx not in seen:
+                    results.append(movie_idx)
+                    if len(results) == limit:
+                        break
+        return results
+
+
+class TitleSpotter:
+    """
+    Finds the catalog titles mentioned anywhere in a piece of text.
+
+    An Aho-Corasick automaton over the words of the normalized titles.
+    The text is scanned once, word by word, following goto and failure
+    links, so the cost grows with the length of the text but not with the
+    number of titles, and every match starts and ends on a word boundary.
+    Titles made only of stop words ("It", "Up", "Her") are left out, since
+    they would match ordinary sentences. Titles starting with an article
+    are also spotted without it.
+
+    The automaton is built with Python dictionaries, then stored as flat
+    arrays (see arrays()): a sorted word vocabulary, transitions sorted by
+    (node, word) and one array per node attribute. Lookups are binary
+    searches, and the arrays are saved with the model artifact and
+    memory-mapped by every worker.
+
+    Titles appended later go into a few small automatons (see extend()),
+    so adding movies costs time in proportion to the added titles rather
+    than the catalog. The model rebuilds a single automaton over every
+    title when it re-weights the catalog or saves the artifact.
+    """
+
+    def __init__(self, words, edge_keys, edge_targets, fail, output, output_alias, next_output, depth):
+        """
+        Wrap existing arrays.
+
+        Args:
+            words: FrozenVocabulary of the title words; a word's id is its
+                position in it
+            edge_keys: Sorted uint64 transition keys, node << 32 | word id
+            edge_targets: int32 node reached by each transition
+            fail: int32 failure link of each node; node 0 is the root
+            output: int32 movie index of the title ending at each node
+                (-1: none)
+            output_alias: Boolean array, True where that title is matched
+                without its leading article
+            next_output: int32 nearest node on the failure chain that ends
+                a title (0: none)
+            depth: int32 number of words from the root to each node
+        """
+        self.words = words
+        self.edge_keys = edge_keys
+        self.edge_targets = edge_targets
+        self.fail = fail
+        self.output = output
+        self.output_alias = output_alias
+        self.next_output = next_output
+        self.depth = depth
+        # (movie index of the first title, titles, automaton) of the titles
+        # appended with extend(), largest first
+        self.added = []
+
+    @classmethod
+    def from_keys(cls, keys, skip_words=ENGLISH_STOP_WORDS):
+        """
+        Build the automaton.
+
+        Args:
+            keys: Normalized titles, in movie index order
+            skip_words: Words that cannot make up a title on their own
+
+        Returns:
+            TitleSpotter
+        """
+        # Transitions keyed by (node, word); node 0 is the root
+        goto = {}
+        fail = [0]
+        output = [-1]
+        output_alias = [False]
+        next_output = [0]
+        depth = [0]
+
+        def insert(key, movie_idx, alias):
+            words = key.split()
+            if all(word in skip_words for word in words):
+                return
+
+            node = 0
+            for word in words:
+                child = goto.get((node, word))
+                if child is None:
+                    child = len(fail)
+                    goto[(node, word)] = child
+                    fail.append(0)
+                    output.append(-1)
+                    output_alias.append(False)
+                    next_output.append(0)
+                    depth.append(depth[node] + 1)
+                node = child
+            if output[node] < 0:
+                output[node] = movie_idx
+                output_alias[node] = alias
+
+        aliases = []
+        for movie_idx, key in enumerate(keys):
+            insert(key, movie_idx, False)
+            alias = strip_article(key)
+            if alias != key:
+                aliases.append((alias, movie_idx))
+        # Real titles first, so they win over an alias with the same words
+        for alias, movie_idx in aliases:
+            insert(alias, movie_idx, True)
+
+        # Failure and output links, breadth-first
+        children = {}
+        for (node, word), child in goto.items():
+            children.setdefault(node, []).append((word, child))
+
+        queue = deque(child for _, child in children.get(0, ()))
+        while queue:
+            node = queue.popleft()
+            for word, child in children.get(node, ()):
+                target = fail[node]
+                while target and (target, word) not in goto:
+                    target = fail[target]
+                target = goto.get((target, word), 0)
+                fail[child] = target
+                next_output[child] = target if output[target] >= 0 else next_output[target]
+                queue.append(child)
+
+        words = sorted({word for _, word in goto}, key=lambda word: word.encode('utf-8'))
+        word_ids = {word: word_id for word_id, word in enumerate(words)}
+        edge_keys = np.fromiter(
+            ((node << 32) | word_ids[word] for node, word in goto),
+            dtype=np.uint64, count=len(goto)
+        )
+        edge_targets = np.fromiter(goto.values(), dtype=np.int32, count=len(goto))
+        order = np.argsort(edge_keys)
+
+        return cls(
+            FrozenVocabulary(words),
+            edge_keys[order],
+            edge_targets[order],
+            np.array(fail, dtype=np.int32),
+            np.array(output, dtype=np.int32),
+            np.array(output_alias, dtype=bool),
+            np.array(next_output, dtype=np.int32),
+            np.array(depth, dtype=np.int32)
+        )
+
+    def extend(self, keys, first_idx):
+        """
+        Spot more titles, appended after the ones the automaton was built from.
+
+        The new titles get an automaton of their own, merged with the most
+        recent ones for as long as those are not larger, so the automatons
+        halve in size from the first to the last. Each title is rebuilt at
+        most log2(titles appended) times, and matching runs through that
+        many automatons at most.
+
+        Args:
+            keys: Normalized titles of the new movies, in movie index order
+            first_idx: Movie index of keys[0]; appended titles must be
+                contiguous
+        """
+        keys = list(keys)
+        while self.added and len(self.added[-1][1]) <= len(keys):
+            first_idx, previous_keys, _ = self.added.pop()
+            keys = previous_keys + keys
+        self.added.append((first_idx, keys, TitleSpotter.from_keys(keys)))
+
+    def arrays(self):
+        """
+        Flatten the automaton into named arrays for persistence.
+
+        Titles added with extend() are not included.
+
+        Returns:
+            Dictionary of array name to numpy array
+        """
+        return {
+            'spotter_words': self.words.terms,
+            'spotter_edge_keys': self.edge_keys,
+            'spotter_edge_targets': self.edge_targets,
+            'spotter_fail': self.fail,
+            'spotter_output': self.output,
+            'spotter_output_alias': self.output_alias,
+            'spotter_next_output': self.next_output,
+            'spotter_depth': self.depth
+        }
+
+    @classmethod
+    def from_arrays(cls, read_array):
+        """
+        Rebuild an automaton persisted with arrays().
+
+        Args:
+            read_array: Callable returning the array stored under a name
+
+        Returns:
+            TitleSpotter
+        """
+        return cls(
+            FrozenVocabulary.from_array(read_array('spotter_words')),
+            read_array('spotter_edge_keys'),
+            read_array('spotter_edge_targets'),
+            read_array('spotter_fail'),
+            read_array('spotter_output'),
+            read_array('spotter_output_alias'),
+            read_array('spotter_next_output'),
+            read_array('spotter_depth')
+        )
+
+    @property
+    def nbytes(self):
+        added_bytes = sum(spotter.nbytes for _, _, spotter in self.added)
+        return sum(array.nbytes for array in self.arrays().values()) + added_bytes
+
+    def _goto(self, node, word_id):
+        """Node reached from node with word_id, or -1 without a transition."""
+        key = np.uint64((node << 32) | word_id)
+        position = np.searchsorted(self.edge_keys, key)
+        if position < len(self.edge_keys) and self.edge_keys[position] == key:
+            return int(self.edge_targets[position])
+        return -1
+
+    def matches(self, text):
+        """
+        List every title occurring in a text.
+
+        Args:
+            text: Normalized text (see normalize_title())
+
+        Returns:
+            List of (first word, end word, movie index) tuples, with word
+            positions counted in the text, ordered by end word
+        """
+        found = self._matches(text)
+        if not self.added:
+            return [(start, end, movie_idx) for start, end, movie_idx, _ in found]
+
+        for first_idx, _, spotter in self.added:
+            found.extend(
+                (start, end, movie_idx + first_idx, alias)
+                for start, end, movie_idx, alias in spotter._matches(text)
+            )
+        # The same words can end a title in several automatons; as within one,
+        # a real title wins over an alias, then the lower movie index
+        best = {}
+        for start, end, movie_idx, alias in found:
+            current = best.get((start, end))
+            if current is None or (alias, movie_idx) < current:
+                best[(start, end)] = (alias, movie_idx)
+        return [
+            (start, end, movie_idx)
+            for (start, end), (_, movie_idx) in sorted(best.items(), key=lambda item: (item[0][1], item[0][0]))
+        ]
+
+    def _matches(self, text):
+        """matches() for the titles the automaton was built from, with a
+        flag telling aliases from real titles."""
+        found = []
+        node = 0
+        for position, word_id in enumerate(self.words.lookup(text.split()).tolist()):
+            if word_id < 0:
+                # No title has this word, so no match runs through it
+                node = 0
+                continue
+
+            child = self._goto(node, word_id)
+            while child < 0 and node:
+                node = int(self.fail[node])
+                child = self._goto(node, word_id)
+            node = max(child, 0)
+
+            hit = node if self.output[node] >= 0 else int(self.next_output[node])
+            while hit:
+                found.append((
+                    position - int(self.depth[hit]) + 1, position + 1, int(self.output[hit]), bool(self.output_alias[hit])
+                ))
+                hit = int(self.next_output[hit])
+        return found
+
+    def find(self, text):
+        """
+        Find the title a text most likely refers to.
+
+        Args:
+            text: Normalized text (see normalize_title())
+
+        Returns:
+            Movie index of the longest title in the text (the first one
+            among equally long titles), or None if it mentions none
+        """
+        best = None
+        for start, end, movie_idx in self.matches(text):
+            if best is None or end - start > best[1] - best[0]:
+                best = (start, end, movie_idx)
+        return best[2] if best is not None else None
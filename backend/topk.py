@@ -0,0 +1,50 @@
+"""
+Partial top-k selection shared by the recommendation model and its indexes
+"""
+import numpy as np
+
+
+def top_k(scores, k, exclude=None):
+    """
+    Select the k highest scores without sorting the whole array.
+    
+    Uses np.argpartition to pick the k best entries in linear time and then
+    sorts only those k. 2-D input is handled row by row.
+    
+    Args:
+        scores: 1-D array of scores, or 2-D array with one row per query
+        k: Number of items to select
+        exclude: Optional boolean mask (same shape as scores) of entries
+            that must never be selected
+        
+    Returns:
+        Tuple of (indices, scores) ordered by descending score. For 1-D
+        input, excluded entries are dropped, so fewer than k items may be
+        returned.
+    """
+    scores = np.asarray(scores)
+    if exclude is not None:
+        scores = np.where(exclude, -np.inf, scores)
+    
+    n_items = scores.shape[-1]
+    k = min(k, n_items)
+    if k <= 0:
+        empty_shape = scores.shape[:-1] + (0,)
+        return np.empty(empty_shape, dtype=np.intp), np.empty(empty_shape, dtype=scores.dtype)
+    
+    if k < n_items:
+        top = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        top = np.broadcast_to(np.arange(n_items), scores.shape).copy()
+    top_scores = np.take_along_axis(scores, top, axis=-1)
+    
+    # Sort only the selected tail
+    order = np.argsort(-top_scores, axis=-1, kind='stable')
+    top = np.take_along_axis(top, order, axis=-1)
+    top_scores = np.take_along_axis(top_scores, order, axis=-1)
+    
+    if scores.ndim == 1 and exclude is not None:
+        keep = top_scores > -np.inf
+        top, top_scores = top[keep], top_scores[keep]
+    
+    return top, top_scores
@@ -3,6 +3,10 @@ import { NextRequest, NextResponse } from 'next/server';
 // Proxy to Python backend
 const BACKEND_URL = process.env.BACKEND_URL || process.env.NEXT_PUBLIC_BACKEND_URL || 'http://127.0.0.1:8000';
 
+// Movie cards show a snippet of the overview, so the backend cuts it to this
+// many characters (0 keeps the full text)
+const OVERVIEW_CHARS = parseInt(process.env.CHAT_OVERVIEW_CHARS || '300', 10);
+
 export async function POST(request: NextRequest) {
   try {
     const body = await request.json();
@@ -24,8 +28,10 @@ export async function POST(request: NextRequest) {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        // Large responses are sent gzip-compressed; fetch decompresses them
+        'Accept-Encoding': 'gzip',
       },
-      body: JSON.stringify(body),
+      body: JSON.stringify(OVERVIEW_CHARS > 0 ? { overview_chars: OVERVIEW_CHARS, ...body } : body),
     });
 
     if (!response.ok) {
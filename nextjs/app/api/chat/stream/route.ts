@@ -0,0 +1,54 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+// Proxy the streaming chat endpoint of the Python backend
+const BACKEND_URL = process.env.BACKEND_URL || process.env.NEXT_PUBLIC_BACKEND_URL || 'http://127.0.0.1:8000';
+
+// Movie cards show a snippet of the overview, so the backend cuts it to this
+// many characters (0 keeps the full text)
+const OVERVIEW_CHARS = parseInt(process.env.CHAT_OVERVIEW_CHARS || '300', 10);
+
+export async function POST(request: NextRequest) {
+  try {
+    const body = await request.json();
+
+    const response = await fetch(`${BACKEND_URL}/api/chat/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'text/event-stream',
+      },
+      body: JSON.stringify(OVERVIEW_CHARS > 0 ? { overview_chars: OVERVIEW_CHARS, ...body } : body),
+    });
+
+    if (!response.ok || !response.body) {
+      const error = await response.json().catch(() => ({ detail: 'Backend request failed' }));
+      return NextResponse.json(
+        {
+          error: error.detail || 'Backend request failed',
+          type: 'error',
+          message: error.detail || `Backend returned ${response.status} status`
+        },
+        { status: response.status || 500 }
+      );
+    }
+
+    // Pass the events through as they arrive instead of buffering the reply
+    return new Response(response.body, {
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+      },
+    });
+  } catch (error: any) {
+    console.error('API route error:', error);
+    return NextResponse.json(
+      {
+        error: error.message || 'Internal server error',
+        type: 'error',
+        message: error.message || 'Failed to connect to backend. Please check your BACKEND_URL configuration.'
+      },
+      { status: 500 }
+    );
+  }
+}
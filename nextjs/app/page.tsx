@@ -21,6 +21,7 @@ interface ChatResponse {
 
 export default function Home() {
   const [messages, setMessages] = useState<Array<{
+    id?: number;
     text: string;
     sender: 'user' | 'ai';
     type?: string;
@@ -48,14 +49,85 @@ export default function Home() {
     scrollToBottom();
   }, [messages, isTyping]);
 
-  const detectIntent = (message: string): string => {
-    const lowerMsg = message.toLowerCase();
-    if (lowerMsg.match(/hello|hi|hey|greetings/i)) {
-      return 'greeting';
-    } else if (lowerMsg.match(/search|find|look for/i)) {
-      return 'search';
+  const showReply = (data: ChatResponse) => {
+    if (data.type === 'greeting') {
+      setMessages(prev => [...prev, { text: data.message, sender: 'ai' }]);
+    } else if (data.type === 'recommendations') {
+      setMessages(prev => [...prev, {
+        text: data.message,
+        sender: 'ai',
+        type: 'recommendations',
+        recommendations: data.recommendations,
+        requestedMovie: data.requested_movie
+      }]);
+    } else if (data.type === 'search_results') {
+      setMessages(prev => [...prev, {
+        text: data.message,
+        sender: 'ai',
+        type: 'search',
+        movies: data.movies
+      }]);
+    } else {
+      setMessages(prev => [...prev, { text: data.message, sender: 'ai' }]);
+    }
+  };
+
+  // Render a streamed reply as its Server-Sent Events arrive: the intro
+  // first, then one card per recommendation
+  const readChatStream = async (response: Response) => {
+    const reader = response.body!.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let replyId: number | null = null;
+
+    const handleEvent = (event: string, data: any) => {
+      if (event === 'intro') {
+        setIsTyping(false);
+        const id = Date.now();
+        replyId = id;
+        setMessages(prev => [...prev, {
+          id,
+          text: data.message,
+          sender: 'ai',
+          type: 'recommendations',
+          recommendations: [],
+          requestedMovie: data.requested_movie
+        }]);
+      } else if (event === 'recommendation') {
+        const id = replyId;
+        setMessages(prev => prev.map(msg => (
+          msg.id === id ? { ...msg, recommendations: [...(msg.recommendations || []), data] } : msg
+        )));
+      } else if (event === 'message' || event === 'error') {
+        setIsTyping(false);
+        showReply(data);
+      }
+    };
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const frame = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = 'message';
+        let data = '';
+        for (const line of frame.split('\n')) {
+          if (line.startsWith('event: ')) {
+            event = line.slice(7);
+          } else if (line.startsWith('data: ')) {
+            data += line.slice(6);
+          }
+        }
+        if (data) {
+          handleEvent(event, JSON.parse(data));
+        }
+      }
     }
-    return 'recommend';
   };
 
   const handleSendMessage = async () => {
@@ -67,40 +139,19 @@ export default function Home() {
     setIsTyping(true);
 
     try {
-      const msgType = detectIntent(message);
-      const response = await fetch(`${API_BASE_URL}/chat`, {
+      // The backend detects the intent and the movie title
+      const response = await fetch(`${API_BASE_URL}/chat/stream`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ message, type: msgType })
+        body: JSON.stringify({ message })
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error('Request failed');
       }
 
-      const data: ChatResponse = await response.json();
+      await readChatStream(response);
       setIsTyping(false);
-
-      if (data.type === 'greeting') {
-        setMessages(prev => [...prev, { text: data.message, sender: 'ai' }]);
-      } else if (data.type === 'recommendations') {
-        setMessages(prev => [...prev, {
-          text: data.message,
-          sender: 'ai',
-          type: 'recommendations',
-          recommendations: data.recommendations,
-          requestedMovie: data.requested_movie
-        }]);
-      } else if (data.type === 'search_results') {
-        setMessages(prev => [...prev, {
-          text: data.message,
-          sender: 'ai',
-          type: 'search',
-          movies: data.movies
-        }]);
-      } else {
-        setMessages(prev => [...prev, { text: data.message, sender: 'ai' }]);
-      }
     } catch (error: any) {
       setIsTyping(false);
       setMessages(prev => [...prev, {